@@ -8,6 +8,8 @@ setup(
     entry_points={
         "console_scripts": [
             "give-me-the-odds = src.cli.cli:main",
+            "odds-loadtest = src.loadtest.loadtest:main",
+            "odds-workers = src.jobs.worker:main",
         ],
     },
 )
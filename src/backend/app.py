@@ -1,14 +1,45 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-import shutil
+from fastapi import (
+    FastAPI,
+    UploadFile,
+    File,
+    HTTPException,
+    Request,
+    Response,
+    Query,
+    Header,
+)
+import asyncio
+import json
 import os
-import tempfile
+import threading
+from dataclasses import asdict
 from src.core.core import OddsService
+from src.core.fast_path import fast_path_index
+from src.core.fingerprint import (
+    empire_fingerprint,
+    falcon_fingerprint,
+    galaxy_fingerprint,
+    galaxy_version,
+)
+from src.backend.caching import EmpireIndex, cache_control, etag_matches, odds_etag
+from src.backend.coalescing import SingleFlight
+from src.store.store import ResultStore
+from src.jobs.queue import QUEUED, JobQueue
+from src.jobs.worker import WorkerPool
 from contextlib import asynccontextmanager
-from src.parser.parser import parse_falcon_config, parse_routes_db
+from src.parser.parser import (
+    parse_falcon_config,
+    parse_empire_content,
+    parse_routes_db,
+)
+from src.schemas.data_models import SearchBudget
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
+# The search logs every state at DEBUG level: set ODDS_LOG_LEVEL=WARNING when
+# measuring performance
+logging.basicConfig(level=os.environ.get("ODDS_LOG_LEVEL", "DEBUG").upper())
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +47,65 @@ SERVICE = OddsService()
 
 FALCON_CONFIG = "./src/backend/millennium-falcon.json"
 
+# Version of the Falcon config and Galaxy loaded at startup
+GALAXY_VERSION: str = None
+GALAXY_HASH: str = None
+FALCON_HASH: str = None
+
+# Optional SQLite file storing complete results across workers and restarts
+RESULT_STORE_PATH = os.environ.get("ODDS_RESULT_STORE")
+RESULT_STORE_MAX_ENTRIES = int(
+    os.environ.get("ODDS_RESULT_STORE_MAX_ENTRIES", "100000")
+)
+RESULT_STORE_MAX_AGE_SECONDS = float(
+    os.environ.get("ODDS_RESULT_STORE_MAX_AGE_SECONDS", str(7 * 24 * 3600))
+)
+RESULT_STORE_MAX_BYTES = int(
+    os.environ.get("ODDS_RESULT_STORE_MAX_BYTES", str(256 * 1024 * 1024))
+)
+RESULT_STORE: ResultStore = None
+
+# Optional SQLite job queue for computations too long for one HTTP request,
+# drained by ODDS_JOB_WORKERS processes started with the server and/or by
+# separately started odds-workers processes
+JOB_QUEUE_PATH = os.environ.get("ODDS_JOB_QUEUE")
+JOB_WORKERS = int(os.environ.get("ODDS_JOB_WORKERS", "0"))
+JOB_TIMEOUT_SECONDS = (
+    float(os.environ["ODDS_JOB_TIMEOUT_SECONDS"])
+    if "ODDS_JOB_TIMEOUT_SECONDS" in os.environ
+    else None
+)
+JOB_QUEUE: JobQueue = None
+
+# Jobs with a higher priority are run first
+MAX_JOB_PRIORITY = 9
+
+# Identical concurrent odds computations share one in-flight search
+COALESCER = SingleFlight()
+
+# Empires recently uploaded to POST /api/v1/odds/, whose odds can then be
+# read with GET /api/v1/odds/{empire_hash}
+EMPIRES = EmpireIndex(int(os.environ.get("ODDS_KNOWN_EMPIRES", "10000")))
+
+# How long browsers and proxies may reuse a complete odds response
+ODDS_CACHE_MAX_AGE_SECONDS = int(os.environ.get("ODDS_CACHE_MAX_AGE_SECONDS", "3600"))
+
+# Search budget of one odds computation; past it the best odds found so far
+# are returned with "complete": false
+ODDS_TIMEOUT_SECONDS = float(os.environ.get("ODDS_TIMEOUT_SECONDS", "10"))
+ODDS_MAX_STATES = (
+    int(os.environ["ODDS_MAX_STATES"]) if "ODDS_MAX_STATES" in os.environ else None
+)
+
+# How often a running computation checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.1
+
+# Largest number of safest routes a client can ask for
+MAX_ROUTES = 20
+
+# Non standard status code used (as nginx does) when the client went away
+CLIENT_CLOSED_REQUEST = 499
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,8 +120,26 @@ async def lifespan(app: FastAPI):
         galaxy = parse_routes_db(falcon_config.routes_db_path)
         logger.debug("Galaxy created from '%s'", falcon_config.routes_db_path)
 
+        # Built before serving, as budgeted requests do not wait for it
+        fast_path_index(falcon_config, galaxy)
+
         SERVICE.falcon_config = falcon_config
         SERVICE.galaxy = galaxy
+
+        global GALAXY_VERSION, GALAXY_HASH, FALCON_HASH, RESULT_STORE, JOB_QUEUE
+        GALAXY_VERSION = galaxy_version(falcon_config, galaxy)
+        GALAXY_HASH = galaxy_fingerprint(galaxy)
+        FALCON_HASH = falcon_fingerprint(falcon_config)
+
+        if RESULT_STORE_PATH:
+            RESULT_STORE = ResultStore(
+                RESULT_STORE_PATH,
+                max_entries=RESULT_STORE_MAX_ENTRIES,
+                max_age_seconds=RESULT_STORE_MAX_AGE_SECONDS,
+                max_bytes=RESULT_STORE_MAX_BYTES,
+            )
+        if JOB_QUEUE_PATH:
+            JOB_QUEUE = JobQueue(JOB_QUEUE_PATH)
         logger.info("Falcon config and Galaxy loaded successfully.")
     except Exception as e:
         logger.exception("Failed to load the Falcon config or routes DB: %s", e)
@@ -39,7 +147,17 @@ async def lifespan(app: FastAPI):
             f"Failed to load the Falcon config or routes DB at startup: {e}"
         ) from e
 
-    yield
+    pool = None
+    if JOB_QUEUE is not None and JOB_WORKERS > 0:
+        pool = WorkerPool(
+            JOB_QUEUE_PATH, FALCON_CONFIG, JOB_WORKERS, timeout=JOB_TIMEOUT_SECONDS
+        )
+        pool.start()
+    try:
+        yield
+    finally:
+        if pool is not None:
+            pool.stop()
 
 
 app = FastAPI(
@@ -55,6 +173,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Location"],
 )
 
 
@@ -67,37 +186,279 @@ def read_root():
     return {"message": "Welcome to the Millennium Falcon Odds API!"}
 
 
-@app.post("/api/v1/odds/")
-async def compute_odds(empire_file: UploadFile = File(...)):
+def stored_result(empire_hash: str, routes: int = 0):
     """
-    Takes an uploaded empire.json file, parse it, then compute the odds.
-    The Falcon config is already loaded at startup.
+    The result of empire_hash from the result store if configured, or None
     """
-    logger.info("POST /api/v1/odds/ called with file: %s", empire_file.filename)
+    if RESULT_STORE is None:
+        return None
+    stored = RESULT_STORE.get(GALAXY_HASH, empire_hash, FALCON_HASH)
+    if stored is not None and stored.has_routes(routes):
+        logger.info("Odds found in the result store for empire %s", empire_hash)
+        return stored.to_odds_result(routes)
+    return None
+
+
+def evaluate_empire(empire, budget: SearchBudget, routes: int = 0):
+    """
+    Compute the odds (and the routes safest routes) of empire, going through
+    the result store if configured
+    """
+    empire_hash = empire_fingerprint(empire)
+    result = stored_result(empire_hash, routes)
+    if result is not None:
+        return result
+
+    # Each computation gets its own service sharing the startup galaxy
+    service = OddsService(falcon_config=SERVICE.falcon_config, galaxy=SERVICE.galaxy)
+    result = service.evaluate(empire, budget, k=routes)
+
+    if RESULT_STORE is not None:
+        stored_routes = [asdict(route) for route in result.routes] if routes else None
+        RESULT_STORE.put(
+            GALAXY_HASH, empire_hash, FALCON_HASH, result, stored_routes, routes
+        )
+    return result
+
 
+def start_odds_computation(empire, routes: int = 0):
+    """
+    Returns the function starting the odds computation of empire in a worker
+    thread, within the configured budget, until its cancel event is set
+    """
+
+    def start(cancel: threading.Event):
+        budget = SearchBudget.from_timeout(
+            ODDS_TIMEOUT_SECONDS, ODDS_MAX_STATES, cancelled=cancel.is_set
+        )
+        return asyncio.to_thread(evaluate_empire, empire, budget, routes)
+
+    return start
+
+
+async def read_empire_file(empire_file: UploadFile):
+    """
+    Parse an uploaded empire.json file, raising a 400 error if it is invalid
+    """
     if not empire_file.filename.endswith(".json"):
         logger.warning("Uploaded file is not JSON: %s", empire_file.filename)
         raise HTTPException(status_code=400, detail="File must be a JSON file")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp:
-        tmp_path = tmp.name
-        logger.debug("Created temporary file: %s", tmp_path)
-        shutil.copyfileobj(empire_file.file, tmp)
-
     try:
-        logger.info(
-            "Computing odds for file '%s' using falcon config '%s'",
-            tmp_path,
-            FALCON_CONFIG,
+        return parse_empire_content(
+            json.loads(await empire_file.read()), empire_file.filename
         )
-        odds = SERVICE.compute_odds(FALCON_CONFIG, tmp_path)
+    except Exception as e:
+        logger.exception("Error while parsing the empire file: %s", e)
+        raise HTTPException(status_code=400, detail=f"Error computing odds: {e}")
 
-        logger.info("Odds computed successfully: %d%%", odds)
-        return {"odds": odds}
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={
+            "ETag": etag,
+            "Cache-Control": cache_control(True, ODDS_CACHE_MAX_AGE_SECONDS),
+        },
+    )
+
+
+def odds_response(result, empire_hash: str, routes: int) -> JSONResponse:
+    """
+    JSON response of an odds result. Complete results carry an ETag and may
+    be cached, and point to the GET URL of the same odds when they are stored.
+    """
+    content = {
+        "odds": result.odds,
+        "complete": result.complete,
+        "stop_reason": result.stop_reason,
+        "fast_path": result.fast_path,
+    }
+    if routes:
+        content["routes"] = [asdict(route) for route in result.routes]
+
+    headers = {
+        "Cache-Control": cache_control(result.complete, ODDS_CACHE_MAX_AGE_SECONDS),
+    }
+    if result.complete:
+        headers["ETag"] = odds_etag(GALAXY_VERSION, empire_hash, routes)
+        # Only the result store lets any server process answer the GET URL
+        if RESULT_STORE is not None:
+            location = f"/api/v1/odds/{empire_hash}"
+            if routes:
+                location += f"?routes={routes}"
+            headers["Content-Location"] = location
+    return JSONResponse(content, headers=headers)
+
+
+async def coalesced_odds(request: Request, empire, empire_hash: str, routes: int):
+    """
+    Compute the odds of empire, sharing the computation with the concurrent
+    requests for the same empire content. It is cancelled once all of their
+    clients have disconnected.
+    """
+    key = f"{GALAXY_VERSION}:{empire_hash}:{routes}"
+    logger.info("Computing odds using falcon config '%s' (key=%s)", FALCON_CONFIG, key)
+
+    flight = COALESCER.join(key, start_odds_computation(empire, routes))
+    try:
+        while True:
+            done, _ = await asyncio.wait({flight.task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                break
+            if await request.is_disconnected():
+                logger.warning("Client disconnected, leaving the computation.")
+                return Response(status_code=CLIENT_CLOSED_REQUEST)
+        result = flight.task.result()
     except Exception as e:
         logger.exception("Error while computing odds: %s", e)
         raise HTTPException(status_code=400, detail=f"Error computing odds: {e}")
     finally:
-        # Clean up the temporary file
-        logger.debug("Removing temp file: %s", tmp_path)
-        os.remove(tmp_path)
+        COALESCER.leave(key, flight)
+
+    logger.info("Odds computed: %d%% (complete=%s)", result.odds, result.complete)
+    return odds_response(result, empire_hash, routes)
+
+
+@app.post("/api/v1/odds/")
+async def compute_odds(
+    request: Request,
+    empire_file: UploadFile = File(...),
+    routes: int = Query(0, ge=0, le=MAX_ROUTES),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Takes an uploaded empire.json file, parse it, then compute the odds.
+    The Falcon config is already loaded at startup.
+    With routes > 0, the safest routes and their itineraries are returned too.
+    If If-None-Match holds the ETag of these odds, 412 is returned without
+    computing them (304 is only allowed for GET). The odds can later be read
+    with the GET URL given in Content-Location.
+    """
+    logger.info("POST /api/v1/odds/ called with file: %s", empire_file.filename)
+    empire = await read_empire_file(empire_file)
+    empire_hash = empire_fingerprint(empire)
+    EMPIRES.add(empire_hash, empire)
+
+    etag = odds_etag(GALAXY_VERSION, empire_hash, routes)
+    if etag_matches(if_none_match, etag):
+        logger.info("Odds of empire %s already known to the client", empire_hash)
+        return Response(status_code=412, headers={"ETag": etag})
+
+    return await coalesced_odds(request, empire, empire_hash, routes)
+
+
+@app.get("/api/v1/odds/{empire_hash}")
+async def read_odds(
+    request: Request,
+    empire_hash: str,
+    routes: int = Query(0, ge=0, le=MAX_ROUTES),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Odds of an empire by its canonical hash (see Content-Location of
+    POST /api/v1/odds/), so that browsers and proxies can cache them.
+    The empire must have been uploaded before, or its result stored.
+    """
+    etag = odds_etag(GALAXY_VERSION, empire_hash, routes)
+    if etag_matches(if_none_match, etag):
+        logger.info("Odds of empire %s not modified", empire_hash)
+        return not_modified(etag)
+
+    empire = EMPIRES.get(empire_hash)
+    if empire is None:
+        result = await asyncio.to_thread(stored_result, empire_hash, routes)
+        if result is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown empire {empire_hash}, POST it to /api/v1/odds/ first",
+            )
+        return odds_response(result, empire_hash, routes)
+
+    return await coalesced_odds(request, empire, empire_hash, routes)
+
+
+@app.get("/api/v1/stats/")
+def read_stats():
+    """
+    Counters of the odds computations started, of the requests coalesced
+    onto an identical in-flight computation and of the result store lookups
+    """
+    stats = {"odds": COALESCER.stats()}
+    if RESULT_STORE is not None:
+        stats["result_store"] = RESULT_STORE.stats()
+    if JOB_QUEUE is not None:
+        stats["jobs"] = JOB_QUEUE.stats()
+    return stats
+
+
+def job_queue() -> JobQueue:
+    if JOB_QUEUE is None:
+        raise HTTPException(
+            status_code=503, detail="The job API is disabled (ODDS_JOB_QUEUE unset)"
+        )
+    return JOB_QUEUE
+
+
+def job_to_json(job) -> dict:
+    """Status, progress and (once done) result of a job"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "priority": job.priority,
+        "submitted_at": job.submitted_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "progress": {
+            "days_processed": job.days_processed,
+            "countdown": job.empire["countdown"],
+            "states_expanded": job.states_expanded,
+        },
+        "cancel_requested": job.cancel_requested,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+@app.post("/api/v1/jobs/", status_code=202)
+async def submit_job(
+    response: Response,
+    empire_file: UploadFile = File(...),
+    priority: int = Query(0, ge=0, le=MAX_JOB_PRIORITY),
+    routes: int = Query(0, ge=0, le=MAX_ROUTES),
+):
+    """
+    Queue the odds computation of an uploaded empire.json file and return
+    its job id right away. Poll GET /api/v1/jobs/{job_id} for its progress
+    and result.
+    """
+    logger.info("POST /api/v1/jobs/ called with file: %s", empire_file.filename)
+    queue = job_queue()
+    empire = await read_empire_file(empire_file)
+
+    job_id = await asyncio.to_thread(queue.submit, asdict(empire), priority, routes)
+    response.headers["Location"] = f"/api/v1/jobs/{job_id}"
+    return {"job_id": job_id, "status": QUEUED}
+
+
+@app.get("/api/v1/jobs/{job_id}")
+def read_job(job_id: str):
+    job = job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job_to_json(job)
+
+
+@app.delete("/api/v1/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """
+    Cancel a job. A running job stops at its next progress report and keeps
+    the best odds found so far as a partial result.
+    """
+    queue = job_queue()
+    if not queue.cancel(job_id):
+        job = queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    return job_to_json(queue.get(job_id))
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from src.schemas.data_models import EmpireData
+
+
+def odds_etag(galaxy_version: str, empire_hash: str, routes: int = 0) -> str:
+    """
+    Strong ETag of the odds of an empire: the result only depends on the
+    canonical empire content, the galaxy version and the routes asked for
+    """
+    return f'"{galaxy_version[:16]}-{empire_hash}-{routes}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header value matches etag (weak comparison, as
+    required for If-None-Match)
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cache_control(complete: bool, max_age: int) -> str:
+    """
+    Cache-Control of an odds response. Partial results depend on the search
+    budget and on the load of the server, so they are never cached.
+    """
+    if not complete:
+        return "no-store"
+    return f"public, max-age={max_age}"
+
+
+class EmpireIndex:
+    """
+    The most recently uploaded empires by canonical hash, so that their odds
+    can be requested again with a plain GET. Bounded, least recently used
+    entries are dropped first.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self.empires: OrderedDict[str, EmpireData] = OrderedDict()
+
+    def add(self, empire_hash: str, empire: EmpireData):
+        self.empires[empire_hash] = empire
+        self.empires.move_to_end(empire_hash)
+        while len(self.empires) > self.max_entries:
+            self.empires.popitem(last=False)
+
+    def get(self, empire_hash: str) -> EmpireData | None:
+        empire = self.empires.get(empire_hash)
+        if empire is not None:
+            self.empires.move_to_end(empire_hash)
+        return empire
+
+    def __len__(self) -> int:
+        return len(self.empires)
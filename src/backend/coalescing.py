@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """
+    One in-flight computation and the requests waiting on it
+    """
+
+    def __init__(self, task: asyncio.Future, cancel: threading.Event):
+        self.task = task
+        self.cancel = cancel
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations sharing the same key: the first request
+    starts the computation, the following ones wait on it and all of them get
+    its result. The computation is cancelled once every waiter has left.
+    """
+
+    def __init__(self):
+        self.flights: dict[str, Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def join(self, key: str, start: Callable[[threading.Event], Awaitable]) -> Flight:
+        """
+        Join the flight of key, starting it with start(cancel) if there is none.
+        Every join must be paired with a leave.
+        """
+        flight = self.flights.get(key)
+        if flight is None:
+            cancel = threading.Event()
+            flight = Flight(asyncio.ensure_future(start(cancel)), cancel)
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+            self.flights[key] = flight
+            self.started += 1
+        else:
+            logger.debug("Coalescing request on in-flight computation %s", key)
+            self.coalesced += 1
+        flight.waiters += 1
+        return flight
+
+    def leave(self, key: str, flight: Flight):
+        """
+        Stop waiting on flight; the last waiter leaving cancels it
+        """
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            logger.info("No request left waiting, cancelling computation %s", key)
+            flight.cancel.set()
+            # Later identical requests must not join a cancelled computation
+            self._land(key, flight)
+
+    def _land(self, key: str, flight: Flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        if flight.task.done() and not flight.task.cancelled():
+            # Mark the exception as retrieved when nobody is left to await it
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self.flights),
+            "computations": self.started,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.backend import app as app_module
+from src.backend.caching import EmpireIndex
+from src.backend.coalescing import SingleFlight
+from src.core.fingerprint import empire_fingerprint
+from src.parser.parser import parse_empire_content
+from src.schemas.data_models import OddsResult
+
+EMPIRE = {
+    "countdown": 9,
+    "bounty_hunters": [
+        {"planet": "Hoth", "day": 6},
+        {"planet": "Hoth", "day": 7},
+        {"planet": "Hoth", "day": 8},
+    ],
+}
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """
+    Returns a function starting the app with the given module settings
+    (e.g. RESULT_STORE_PATH), each test getting fresh server state
+    """
+    monkeypatch.setattr(app_module, "EMPIRES", EmpireIndex())
+    monkeypatch.setattr(app_module, "COALESCER", SingleFlight())
+    monkeypatch.setattr(app_module, "RESULT_STORE", None)
+    monkeypatch.setattr(app_module, "JOB_QUEUE", None)
+
+    def start(**settings):
+        for name, value in settings.items():
+            monkeypatch.setattr(app_module, name, value)
+        return TestClient(app_module.app)
+
+    return start
+
+
+def upload(empire: dict = EMPIRE):
+    return {"empire_file": ("empire.json", json.dumps(empire), "application/json")}
+
+
+def test_post_odds(serve):
+    with serve() as client:
+        response = client.post("/api/v1/odds/", files=upload())
+
+    assert response.status_code == 200
+    assert response.json()["odds"] == 90
+    assert response.json()["complete"]
+    assert response.headers["Cache-Control"].startswith("public")
+    assert "ETag" in response.headers
+    # Only advertised when any server process can answer it
+    assert "Content-Location" not in response.headers
+
+
+def test_post_with_matching_etag_is_a_failed_precondition(serve):
+    with serve() as client:
+        etag = client.post("/api/v1/odds/", files=upload()).headers["ETag"]
+        response = client.post(
+            "/api/v1/odds/", files=upload(), headers={"If-None-Match": etag}
+        )
+
+    assert response.status_code == 412
+    assert response.headers["ETag"] == etag
+
+
+def test_get_odds_through_content_location(serve, tmp_path):
+    with serve(RESULT_STORE_PATH=str(tmp_path / "results.db")) as client:
+        posted = client.post("/api/v1/odds/", files=upload(), params={"routes": 2})
+        location = posted.headers["Content-Location"]
+
+        # Another server process only knows the stored result
+        app_module.EMPIRES = EmpireIndex()
+        response = client.get(location)
+        assert response.status_code == 200
+        assert response.json() == posted.json()
+        assert response.headers["ETag"] == posted.headers["ETag"]
+
+        not_modified = client.get(
+            location, headers={"If-None-Match": posted.headers["ETag"]}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        assert client.get("/api/v1/odds/unknown").status_code == 404
+
+
+def test_fast_path_results_are_stored_with_the_same_body(serve, tmp_path):
+    empire = {"countdown": 10, "bounty_hunters": []}
+    with serve(RESULT_STORE_PATH=str(tmp_path / "results.db")) as client:
+        computed = client.post("/api/v1/odds/", files=upload(empire))
+        stored = client.post("/api/v1/odds/", files=upload(empire))
+        read = client.get(computed.headers["Content-Location"])
+
+    assert computed.json()["fast_path"] == "no_hunters_in_reach"
+    for response in (stored, read):
+        assert response.json() == computed.json()
+        assert response.headers["ETag"] == computed.headers["ETag"]
+
+
+def test_stored_routes_answer_when_fewer_exist(serve, tmp_path):
+    with serve(RESULT_STORE_PATH=str(tmp_path / "results.db")) as client:
+        first = client.post("/api/v1/odds/", files=upload(), params={"routes": 20})
+        second = client.post("/api/v1/odds/", files=upload(), params={"routes": 20})
+        stats = client.get("/api/v1/stats/").json()["result_store"]
+
+    assert len(first.json()["routes"]) < 20
+    assert second.json() == first.json()
+    assert stats == {"hits": 1, "misses": 1}
+
+
+def test_computation_left_when_the_client_disconnects(monkeypatch, serve):
+    cancelled = []
+
+    def evaluate_until_cancelled(empire, budget, routes=0):
+        while not budget.cancelled():
+            time.sleep(0.01)
+        cancelled.append(True)
+        return OddsResult(odds=0, min_hunters=None, complete=False)
+
+    class DisconnectedRequest:
+        async def is_disconnected(self):
+            return True
+
+    monkeypatch.setattr(app_module, "evaluate_empire", evaluate_until_cancelled)
+    empire = parse_empire_content(EMPIRE, "empire.json")
+
+    async def request_odds():
+        response = await app_module.coalesced_odds(
+            DisconnectedRequest(), empire, empire_fingerprint(empire), 0
+        )
+        # The computation stops once its last client left
+        while not cancelled:
+            await asyncio.sleep(0.01)
+        return response
+
+    with serve():
+        response = asyncio.run(request_odds())
+    assert response.status_code == app_module.CLIENT_CLOSED_REQUEST
+
+
+def test_jobs_api(serve, tmp_path):
+    with serve() as client:
+        assert client.post("/api/v1/jobs/", files=upload()).status_code == 503
+
+    with serve(JOB_QUEUE_PATH=str(tmp_path / "jobs.db"), JOB_WORKERS=0) as client:
+        response = client.post("/api/v1/jobs/", files=upload(), params={"priority": 3})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.headers["Location"] == f"/api/v1/jobs/{job_id}"
+
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert (job["status"], job["priority"]) == ("queued", 3)
+
+        assert client.delete(f"/api/v1/jobs/{job_id}").json()["status"] == "cancelled"
+        assert client.delete(f"/api/v1/jobs/{job_id}").status_code == 409
+        assert client.get("/api/v1/jobs/unknown").status_code == 404
@@ -0,0 +1,44 @@
+from src.backend.caching import EmpireIndex, cache_control, etag_matches, odds_etag
+from src.schemas.data_models import EmpireData
+
+GALAXY_VERSION = "a" * 64
+
+
+def test_odds_etag_depends_on_galaxy_empire_and_routes():
+    etag = odds_etag(GALAXY_VERSION, "empire", 0)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == odds_etag(GALAXY_VERSION, "empire", 0)
+    assert etag != odds_etag("b" * 64, "empire", 0)
+    assert etag != odds_etag(GALAXY_VERSION, "other-empire", 0)
+    assert etag != odds_etag(GALAXY_VERSION, "empire", 3)
+
+
+def test_etag_matches():
+    etag = odds_etag(GALAXY_VERSION, "empire")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_partial_results_are_not_cached():
+    assert cache_control(True, 60) == "public, max-age=60"
+    assert cache_control(False, 60) == "no-store"
+
+
+def test_empire_index_drops_least_recently_used():
+    index = EmpireIndex(max_entries=2)
+    empires = [EmpireData(countdown=i, bounty_hunters=[]) for i in range(3)]
+
+    index.add("e0", empires[0])
+    index.add("e1", empires[1])
+    assert index.get("e0") is empires[0]
+    index.add("e2", empires[2])
+
+    assert len(index) == 2
+    assert index.get("e1") is None
+    assert index.get("e0") is empires[0]
+    assert index.get("e2") is empires[2]
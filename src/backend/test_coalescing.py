@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from src.backend.coalescing import SingleFlight
+
+
+def test_concurrent_joins_share_one_computation():
+    async def scenario():
+        coalescer = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def compute(cancel):
+            calls.append(cancel)
+            await release.wait()
+            return 42
+
+        async def request():
+            flight = coalescer.join("key", compute)
+            try:
+                return await flight.task
+            finally:
+                coalescer.leave("key", flight)
+
+        waiters = [asyncio.ensure_future(request()) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert results == [42] * 5
+        assert len(calls) == 1
+        assert coalescer.stats() == {"in_flight": 0, "computations": 1, "coalesced": 4}
+
+        # Once landed, the same key starts a new computation
+        flight = coalescer.join("key", compute)
+        assert await flight.task == 42
+        coalescer.leave("key", flight)
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_last_waiter_leaving_cancels_the_computation():
+    async def scenario():
+        coalescer = SingleFlight()
+        stopped = threading.Event()
+
+        def search(cancel):
+            cancel.wait(timeout=5)
+            stopped.set()
+            return None
+
+        def compute(cancel):
+            return asyncio.to_thread(search, cancel)
+
+        first = coalescer.join("key", compute)
+        second = coalescer.join("key", compute)
+
+        coalescer.leave("key", first)
+        assert not first.cancel.is_set()
+
+        coalescer.leave("key", second)
+        assert second.cancel.is_set()
+        assert "key" not in coalescer.flights
+
+        await second.task
+        assert stopped.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_failed_computation_is_shared():
+    async def scenario():
+        coalescer = SingleFlight()
+
+        async def compute(cancel):
+            raise ValueError("broken empire")
+
+        flights = [coalescer.join("key", compute) for _ in range(2)]
+        for flight in flights:
+            try:
+                await flight.task
+            except ValueError as e:
+                assert str(e) == "broken empire"
+            else:
+                raise AssertionError("the computation error was not raised")
+            finally:
+                coalescer.leave("key", flight)
+
+    asyncio.run(scenario())
@@ -1,6 +1,176 @@
 import argparse
+import cProfile
+import json
+import pstats
+import os
 import sys
-from src.core.core import OddsService
+from collections import deque
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+from src.core.core import ENGINES, OddsService
+from src.core.fast_path import fast_path_index
+from src.core.profiling import ProfileTracer, collapsed_stacks
+from src.parser.parser import (
+    parse_falcon_config,
+    parse_empire_data,
+    parse_empire_content,
+    parse_routes_db,
+)
+
+STDIN_SOURCE = "-"
+
+# Number of empire scenarios sent to a worker process at once
+BATCH_CHUNK_SIZE = 64
+
+# Service used to score the empire scenarios of the current process
+_batch_service: OddsService = None
+# Number of safest routes reported for each scenario
+_batch_routes = 0
+# Search engine enumerating the journeys of each scenario
+_batch_engine = "bfs"
+
+
+def iter_empire_inputs(empire_configs: list[str], stdin=None):
+    """
+    Expand the empire arguments into (source, content) pairs, in input order.
+    A directory yields all of its .json files (sorted by name), "-" yields one
+    item per non-empty JSONL line read from stdin and anything else is a file.
+    content is None for files, which are read by the worker scoring them.
+    """
+    for empire_config in empire_configs:
+        if empire_config == STDIN_SOURCE:
+            stdin = stdin if stdin is not None else sys.stdin
+            for line_number, line in enumerate(stdin, start=1):
+                if line.strip():
+                    yield f"<stdin>:{line_number}", line
+        elif os.path.isdir(empire_config):
+            for name in sorted(os.listdir(empire_config)):
+                if name.endswith(".json"):
+                    yield os.path.join(empire_config, name), None
+        else:
+            yield empire_config, None
+
+
+def _init_batch_worker(falcon_config, galaxy, routes: int = 0, engine: str = "bfs"):
+    """Build the service of a worker process from the already loaded galaxy"""
+    global _batch_service, _batch_routes, _batch_engine
+    _batch_service = OddsService(falcon_config=falcon_config, galaxy=galaxy)
+    fast_path_index(falcon_config, galaxy)
+    _batch_routes = routes
+    _batch_engine = engine
+
+
+def routes_to_json(routes) -> list[dict]:
+    return [asdict(route) for route in routes]
+
+
+def _score_empire(source: str, content: str) -> dict:
+    """Compute the odds of one empire scenario, reporting errors in the result"""
+    try:
+        if content is None:
+            empire = parse_empire_data(source)
+        else:
+            empire = parse_empire_content(json.loads(content), source)
+        if not _batch_routes:
+            return {
+                "empire": source,
+                "odds": _batch_service.compute_odds_for_empire(
+                    empire, engine=_batch_engine
+                ),
+            }
+        result = _batch_service.evaluate(empire, k=_batch_routes)
+        return {
+            "empire": source,
+            "odds": result.odds,
+            "routes": routes_to_json(result.routes),
+        }
+    except Exception as e:
+        return {"empire": source, "error": str(e)}
+
+
+def _score_chunk(chunk: list[tuple[str, str]]) -> list[dict]:
+    return [_score_empire(source, content) for source, content in chunk]
+
+
+def _chunks(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(
+    falcon_config_path: str,
+    inputs,
+    workers: int = 1,
+    routes: int = 0,
+    engine: str = "bfs",
+):
+    """
+    Score every empire scenario of inputs against a galaxy loaded once.
+    Yields one result dict per input, in input order, with the routes safest
+    routes of each scenario if routes > 0.
+    """
+    falcon_config = parse_falcon_config(falcon_config_path)
+    galaxy = parse_routes_db(falcon_config.routes_db_path)
+
+    if workers <= 1:
+        _init_batch_worker(falcon_config, galaxy, routes, engine)
+        for source, content in inputs:
+            yield _score_empire(source, content)
+        return
+
+    # Keep a bounded window of chunks in flight so that results can be
+    # streamed in input order without reading the whole input first
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_batch_worker,
+        initargs=(falcon_config, galaxy, routes, engine),
+    ) as executor:
+        pending = deque()
+        for chunk in _chunks(inputs, BATCH_CHUNK_SIZE):
+            pending.append(executor.submit(_score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def profile_odds(
+    falcon_config_path: str, empire_config_path: str, prefix: str, engine: str = "bfs"
+):
+    """
+    Compute the odds under cProfile and a ProfileTracer, then write
+    <prefix>.json (tracer report), <prefix>.prof (cProfile dump) and
+    <prefix>.collapsed (collapsed stacks for flamegraph tools)
+    """
+    tracer = ProfileTracer()
+    service = OddsService(tracer=tracer, bounded_galaxy=True)
+    profiler = cProfile.Profile()
+
+    profiler.enable()
+    try:
+        odds = service.compute_odds(
+            falcon_config_path, empire_config_path, engine=engine
+        )
+    finally:
+        profiler.disable()
+
+    report = {"odds": odds, **tracer.report()}
+    with open(f"{prefix}.json", "w") as report_file:
+        json.dump(report, report_file, indent=2)
+
+    profiler.dump_stats(f"{prefix}.prof")
+
+    with open(f"{prefix}.collapsed", "w") as collapsed_file:
+        for line in collapsed_stacks(pstats.Stats(profiler)):
+            collapsed_file.write(line + "\n")
+
+    return odds
 
 
 def main():
@@ -12,15 +182,111 @@ def main():
         "falcon_config", type=str, help="Path to the millennium-falcon.json file."
     )
 
-    parser.add_argument("empire_config", type=str, help="Path to the empire.json file.")
+    parser.add_argument(
+        "empire_config",
+        type=str,
+        nargs="+",
+        help=(
+            "Path to the empire.json file. Several files or directories of .json "
+            "files can be given, or '-' to read one empire per line (JSONL) from "
+            "stdin; results are then written as JSONL in input order."
+        ),
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to score several empire files.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="PREFIX",
+        help=(
+            "Profile the computation and write PREFIX.json (per-phase durations, "
+            "per-day frontier sizes, hot planets), PREFIX.prof (cProfile) and "
+            "PREFIX.collapsed (collapsed stacks for flamegraphs)."
+        ),
+    )
+
+    parser.add_argument(
+        "--routes",
+        type=int,
+        default=0,
+        metavar="K",
+        help=(
+            "Also report the K routes meeting the fewest bounty hunters, with "
+            "their odds and day-by-day itineraries, as JSON."
+        ),
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="bfs",
+        help=(
+            "How journeys are enumerated: breadth first (bfs) or depth first "
+            "(dfs, memory proportional to the route length)."
+        ),
+    )
 
     args = parser.parse_args()
 
-    service = OddsService()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
 
+    if args.routes < 0:
+        parser.error("--routes must be positive")
+
+    if args.routes and args.profile:
+        parser.error("--routes cannot be combined with --profile")
+
+    batch = len(args.empire_config) > 1 or any(
+        empire_config == STDIN_SOURCE or os.path.isdir(empire_config)
+        for empire_config in args.empire_config
+    )
+
+    if batch and args.profile:
+        parser.error("--profile only supports a single empire file")
+
+    if not batch:
+        # A single scenario only needs the routes reachable within its countdown
+        service = OddsService(bounded_galaxy=True)
+
+        try:
+            if args.profile:
+                odds = profile_odds(
+                    args.falcon_config, args.empire_config[0], args.profile, args.engine
+                )
+            elif args.routes:
+                service.init_journey(args.falcon_config, args.empire_config[0])
+                result = service.solve_safest_routes(args.routes)
+                odds = json.dumps(
+                    {"odds": result.odds, "routes": routes_to_json(result.routes)},
+                    indent=2,
+                )
+            else:
+                odds = service.compute_odds(
+                    args.falcon_config, args.empire_config[0], engine=args.engine
+                )
+            print(odds)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            sys.exit(1)
+        return
+
+    failed = False
     try:
-        odds = service.compute_odds(args.falcon_config, args.empire_config)
-        print(odds)
+        inputs = iter_empire_inputs(args.empire_config)
+        for result in run_batch(
+            args.falcon_config, inputs, args.workers, args.routes, args.engine
+        ):
+            failed = failed or "error" in result
+            print(json.dumps(result))
     except Exception as e:
         print(f"An error occurred: {e}")
         sys.exit(1)
+
+    if failed:
+        sys.exit(1)
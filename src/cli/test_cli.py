@@ -1,3 +1,5 @@
+import io
+import json
 import sys
 import pytest
 from src.cli.cli import main as cli_main
@@ -107,3 +109,167 @@ def test_cli_subprocess_missing_files():
 
     assert result.returncode == 1, "CLI should exit with code 1 when files are missing"
     assert "An error occurred:" in result.stdout or result.stderr
+
+
+def test_cli_batch_jsonl_in_input_order(monkeypatch, capsys):
+    """
+    Several empire files are scored against one galaxy and written as JSONL,
+    in the order they were given.
+    """
+    empire_configs = [f"./examples/example{i}/empire.json" for i in (4, 1, 3, 2)]
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["give-me-the-odds", "./examples/example1/millennium-falcon.json"]
+        + empire_configs,
+    )
+
+    cli_main()
+
+    captured = capsys.readouterr()
+    results = [json.loads(line) for line in captured.out.splitlines()]
+    assert [r["empire"] for r in results] == empire_configs
+    assert [r["odds"] for r in results] == [100, 0, 90, 81]
+
+
+def test_cli_batch_stdin_with_workers(monkeypatch, capsys):
+    """
+    JSONL scenarios read from stdin are spread over worker processes and the
+    results still come back in input order.
+    """
+    countdowns = [7, 8, 9, 10] * 50
+    lines = [
+        json.dumps(
+            {
+                "countdown": countdown,
+                "bounty_hunters": [
+                    {"planet": "Hoth", "day": 6},
+                    {"planet": "Hoth", "day": 7},
+                    {"planet": "Hoth", "day": 8},
+                ],
+            }
+        )
+        for countdown in countdowns
+    ]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "give-me-the-odds",
+            "./examples/example1/millennium-falcon.json",
+            "-",
+            "--workers",
+            "2",
+        ],
+    )
+
+    cli_main()
+
+    captured = capsys.readouterr()
+    results = [json.loads(line) for line in captured.out.splitlines()]
+    assert [r["empire"] for r in results] == [
+        f"<stdin>:{i}" for i in range(1, len(lines) + 1)
+    ]
+    assert [r["odds"] for r in results] == [0, 81, 90, 100] * 50
+
+
+def test_cli_batch_reports_errors_per_scenario(monkeypatch, capsys, tmp_path):
+    """
+    A broken scenario is reported on its own line, the others are still scored
+    and the CLI exits with code 1.
+    """
+    (tmp_path / "a.json").write_text('{"countdown": 10, "bounty_hunters": []}')
+    (tmp_path / "b.json").write_text('{"countdown": 10}')
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "give-me-the-odds",
+            "./examples/example1/millennium-falcon.json",
+            str(tmp_path),
+        ],
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli_main()
+
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    results = [json.loads(line) for line in captured.out.splitlines()]
+    assert len(results) == 2
+    assert results[0] == {"empire": str(tmp_path / "a.json"), "odds": 100}
+    assert "bounty_hunters" in results[1]["error"]
+
+
+def test_cli_profile_writes_reports(monkeypatch, capsys, tmp_path):
+    """
+    --profile prints the odds as usual and writes the tracer report, the
+    cProfile dump and the collapsed stacks next to the given prefix.
+    """
+    prefix = tmp_path / "profile"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "give-me-the-odds",
+            "./examples/example3/millennium-falcon.json",
+            "./examples/example3/empire.json",
+            "--profile",
+            str(prefix),
+        ],
+    )
+
+    cli_main()
+
+    assert capsys.readouterr().out.strip() == "90"
+
+    report = json.loads((tmp_path / "profile.json").read_text())
+    assert report["odds"] == 90
+    assert report["states_expanded"] > 0
+    assert {"load", "search", "score"} <= set(report["phases_seconds"])
+    assert (tmp_path / "profile.prof").stat().st_size > 0
+    assert (tmp_path / "profile.collapsed").read_text().strip()
+
+
+def test_cli_routes_reports_safest_itineraries(monkeypatch, capsys):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "give-me-the-odds",
+            "./examples/example3/millennium-falcon.json",
+            "./examples/example3/empire.json",
+            "--routes",
+            "3",
+        ],
+    )
+
+    cli_main()
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["odds"] == 90
+    assert [route["hunters"] for route in output["routes"]] == [1, 2, 2]
+    assert [route["odds"] for route in output["routes"]] == [90, 81, 81]
+    for route in output["routes"]:
+        assert route["itinerary"][0]["planet"] == "Tatooine"
+        assert route["itinerary"][-1]["planet"] == "Endor"
+
+
+def test_cli_batch_dfs_engine(monkeypatch, capsys):
+    empire_configs = [f"./examples/example{i}/empire.json" for i in (1, 2, 3, 4)]
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["give-me-the-odds", "./examples/example1/millennium-falcon.json"]
+        + empire_configs
+        + ["--engine", "dfs"],
+    )
+
+    cli_main()
+
+    captured = capsys.readouterr()
+    results = [json.loads(line) for line in captured.out.splitlines()]
+    assert [r["odds"] for r in results] == [0, 81, 90, 100]
@@ -1,21 +1,137 @@
+from bisect import insort
 from collections import deque
+from itertools import count
 import math
-from src.schemas.data_models import FalconConfig, EmpireData, BountyHunter, JourneyLog
+import time
+from src.schemas.data_models import (
+    FalconConfig,
+    EmpireData,
+    BountyHunter,
+    JourneyLog,
+    SearchBudget,
+    OddsResult,
+    ItineraryStep,
+    RouteOption,
+)
 from src.schemas.galaxy import Galaxy
 from src.parser.parser import parse_falcon_config, parse_empire_data, parse_routes_db
+from src.core.profiling import Tracer, NULL_TRACER
+from src.core.fast_path import UNREACHABLE, fast_path_index
 import logging
 
 logger = logging.getLogger(__name__)
 
+# The deadline and the cancellation check of a SearchBudget are only polled
+# every BUDGET_CHECK_INTERVAL expanded states
+BUDGET_CHECK_INTERVAL = 256
+
+
+class SearchBudgetExceeded(Exception):
+    """
+    Raised by the search when its SearchBudget runs out.
+    Carries the successful journeys (or routes) found before stopping.
+    """
+
+    def __init__(
+        self,
+        reason: str,
+        successful_journeys: list[JourneyLog] = None,
+        routes: list[RouteOption] = None,
+    ):
+        super().__init__(f"Search budget exceeded: {reason}")
+        self.reason = reason
+        self.successful_journeys = successful_journeys or []
+        self.routes = routes or []
+
+
+def budget_stop_reason(budget: SearchBudget, states_expanded: int) -> str | None:
+    """
+    Name of the limit of budget hit after states_expanded states, or None
+    """
+    if budget.max_states is not None and states_expanded > budget.max_states:
+        return "max_states"
+    if states_expanded % BUDGET_CHECK_INTERVAL:
+        return None
+    if budget.cancelled is not None and budget.cancelled():
+        return "cancelled"
+    if budget.deadline is not None and time.monotonic() >= budget.deadline:
+        return "deadline"
+    return None
+
+
+# Ways to enumerate the successful journeys, see iter_successful_journeys
+ENGINES = ("bfs", "dfs")
+
+
+def odds_from_hunters(min_hunters: int) -> int:
+    """
+    Odds (in percent) of not being captured when meeting min_hunters bounty hunters
+    """
+    probability_being_captured = 0.0
+    for i in range(min_hunters):
+        probability_being_captured += (9**i) / (10 ** (i + 1))
+
+    probability_not_captured = 1 - probability_being_captured
+    return int(probability_not_captured * 100)
+
 
 class OddsService:
     """Main service to compute the odds of reaching target planet"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        falcon_config: FalconConfig = None,
+        galaxy: Galaxy = None,
+        tracer: Tracer = None,
+        bounded_galaxy: bool = False,
+        fast_paths: bool = True,
+    ):
+        """
+        With bounded_galaxy, init_journey only loads the routes reachable
+        within the countdown of the empire instead of the whole routes DB.
+        With fast_paths, solve first tries to settle the odds from cached
+        shortest paths (see fast_path.py) before searching.
+        """
         self.bounty_hunter_presence: dict[str, set[int]] = {}
         self.empire: EmpireData = None
-        self.falcon_config: FalconConfig = None
-        self.galaxy: Galaxy = None
+        self.falcon_config: FalconConfig = falcon_config
+        self.galaxy: Galaxy = galaxy
+        self.tracer: Tracer = tracer or NULL_TRACER
+        self.bounded_galaxy = bounded_galaxy
+        self.fast_paths = fast_paths
+        # Travel time the loaded galaxy is bounded to, None if fully loaded
+        self.galaxy_radius: int = None
+
+    def load_falcon_config(self, config_file_path: str, max_travel_time: int = None):
+        """
+        Load the Falcon Config and the Galaxy DB routes it points to.
+        With max_travel_time, only the routes reachable from the departure
+        within that many days are loaded.
+        """
+        logger.debug("Parsing Falcon config from %s", config_file_path)
+        self.falcon_config = parse_falcon_config(config_file_path)
+        logger.debug("Falcon config loaded: %s", self.falcon_config)
+
+        self.galaxy = parse_routes_db(
+            self.falcon_config.routes_db_path,
+            departure=self.falcon_config.departure,
+            max_travel_time=max_travel_time,
+            autonomy=self.falcon_config.autonomy,
+        )
+        self.galaxy_radius = max_travel_time
+        logger.debug("Galaxy built from DB: %s", self.falcon_config.routes_db_path)
+
+    def load_empire(self, empire: EmpireData):
+        """Set the Empire Data and rebuild the bounty hunter presence index"""
+        self.empire = empire
+        self.bounty_hunter_presence = {}
+
+        for bh in self.empire.bounty_hunters:
+            if bh.planet not in self.bounty_hunter_presence:
+                self.bounty_hunter_presence[bh.planet] = set()
+            self.bounty_hunter_presence[bh.planet].add(bh.day)
+
+        logger.info("Bounty hunter presence updated: %s", self.bounty_hunter_presence)
 
     def init_journey(self, config_file_path: str, empire_data_path: str):
         """Load Falcon Config and Empire Data and Galaxy DB routes"""
@@ -24,67 +140,217 @@ class OddsService:
             config_file_path,
             empire_data_path,
         )
-        self.empire = parse_empire_data(empire_data_path)
+        empire = parse_empire_data(empire_data_path)
 
         if self.falcon_config is None:
-            logger.debug(
-                "Falcon config not yet loaded, parsing from %s", config_file_path
+            logger.debug("Falcon config not yet loaded")
+            self.load_falcon_config(
+                config_file_path, empire.countdown if self.bounded_galaxy else None
             )
-            self.falcon_config = parse_falcon_config(config_file_path)
-            logger.debug("Falcon config loaded: %s", self.falcon_config)
-
-            self.galaxy = parse_routes_db(self.falcon_config.routes_db_path)
-            logger.debug("Galaxy built from DB: %s", self.falcon_config.routes_db_path)
-
-        for bh in self.empire.bounty_hunters:
-            if bh.planet not in self.bounty_hunter_presence:
-                self.bounty_hunter_presence[bh.planet] = set()
-            self.bounty_hunter_presence[bh.planet].add(bh.day)
-
-        logger.info("Bounty hunter presence updated: %s", self.bounty_hunter_presence)
-
-    def compute_odds(self, config_file_path, empire_data_path):
+        elif self.galaxy_radius is not None and empire.countdown > self.galaxy_radius:
+            logger.debug("Countdown beyond the loaded galaxy, reloading it")
+            self.load_falcon_config(config_file_path, empire.countdown)
+
+        self.load_empire(empire)
+
+    def compute_odds(
+        self,
+        config_file_path,
+        empire_data_path,
+        budget: SearchBudget = None,
+        engine: str = "bfs",
+    ):
         """
-        Main Function to compute the odds of reaching the target planet
+        Main Function to compute the odds of reaching the target planet.
+        If budget runs out, the odds of the best route found so far are returned.
         """
         logger.info(
             "Computing odds with Falcon config: %s, Empire data: %s",
             config_file_path,
             empire_data_path,
         )
-        self.init_journey(config_file_path, empire_data_path)
+        with self.tracer.phase("load"):
+            self.init_journey(config_file_path, empire_data_path)
+        return self.odds(budget, engine)
 
-        successful_journeys = self.find_successful_paths()
-        logger.info("Found %d successful journeys.", len(successful_journeys))
+    def compute_odds_for_empire(
+        self, empire: EmpireData, budget: SearchBudget = None, engine: str = "bfs"
+    ) -> int:
+        """
+        Compute the odds for already parsed Empire Data.
+        The Falcon config and the Galaxy must already be loaded.
+        """
+        return self.evaluate(empire, budget, engine=engine).odds
+
+    def evaluate(
+        self,
+        empire: EmpireData,
+        budget: SearchBudget = None,
+        k: int = 0,
+        engine: str = "bfs",
+    ) -> OddsResult:
+        """
+        Same as compute_odds_for_empire, but tells whether the search completed.
+        With k > 0, the k safest routes are returned as well.
+        Otherwise engine selects how journeys are enumerated, see
+        iter_successful_journeys.
+        """
+        if self.falcon_config is None or self.galaxy is None:
+            raise RuntimeError("Falcon config and Galaxy must be loaded first")
 
-        if not len(successful_journeys):
-            logger.info("No successful journeys found. Odds = 0%")
-            return 0
+        with self.tracer.phase("load"):
+            self.load_empire(empire)
+        if k > 0:
+            return self.solve_safest_routes(k, budget)
+        return self.solve(budget, engine)
 
-        min_hunters = math.inf
-        for journey in successful_journeys:
-            hunters_encountered = self.number_of_hunters_on_route(journey.route)
-            min_hunters = min(min_hunters, hunters_encountered)
+    def solve_safest_routes(self, k: int, budget: SearchBudget = None) -> OddsResult:
+        """
+        Same as solve, through find_safest_routes: the result also holds
+        the k safest routes (or those found before the budget ran out)
+        """
+        complete, stop_reason = True, None
+        with self.tracer.phase("search"):
+            try:
+                routes = self.find_safest_routes(k, budget)
+            except SearchBudgetExceeded as e:
+                logger.warning("Search stopped early: %s", e)
+                routes = e.routes
+                complete, stop_reason = False, e.reason
+
+        min_hunters = routes[0].hunters if routes else None
+        odds_percent = routes[0].odds if routes else 0
+        logger.info("Computed odds = %d%% (min_hunters=%s)", odds_percent, min_hunters)
+        return OddsResult(
+            odds=odds_percent,
+            min_hunters=min_hunters,
+            complete=complete,
+            stop_reason=stop_reason,
+            routes=routes,
+        )
+
+    def odds(self, budget: SearchBudget = None, engine: str = "bfs") -> int:
+        """
+        Compute the odds for the currently loaded Falcon config, Galaxy and Empire
+        """
+        return self.solve(budget, engine).odds
 
-        probability_being_captured = 0.0
-        for i in range(min_hunters):
-            probability_being_captured += (9**i) / (10 ** (i + 1))
+    def solve(self, budget: SearchBudget = None, engine: str = "bfs") -> OddsResult:
+        """
+        Search the currently loaded Falcon config, Galaxy and Empire.
+        Successful journeys are streamed from iter_successful_journeys and only
+        the minimum number of hunters is kept; the search stops early once a
+        route without bounty hunters is found.
+        When budget runs out, the search stops and the result is partial:
+        its odds are those of the best route found so far, a lower bound.
+        """
+        if self.fast_paths:
+            with self.tracer.phase("precheck"):
+                # A budgeted search does not wait for the index to be built
+                result = self.fast_path_result(build=budget is None)
+            if result is not None:
+                return result
+
+        complete, stop_reason = True, None
+        min_hunters = math.inf
+        journeys_found = 0
+        with self.tracer.phase("search"):
+            try:
+                for _, hunters in self.iter_successful_journeys(budget, engine):
+                    journeys_found += 1
+                    min_hunters = min(min_hunters, hunters)
+                    if min_hunters == 0:
+                        logger.info("Found a route without bounty hunters.")
+                        break
+            except SearchBudgetExceeded as e:
+                logger.warning("Search stopped early: %s", e)
+                complete, stop_reason = False, e.reason
+        logger.info("Found %d successful journeys.", journeys_found)
+
+        if not journeys_found:
+            logger.info("No successful journeys found. Odds = 0%")
+            return OddsResult(
+                odds=0, min_hunters=None, complete=complete, stop_reason=stop_reason
+            )
 
-        probability_not_captured = 1 - probability_being_captured
-        odds_percent = int(probability_not_captured * 100)
+        odds_percent = odds_from_hunters(min_hunters)
 
         logger.info("Computed odds = %d%% (min_hunters=%d)", odds_percent, min_hunters)
-        return odds_percent
+        return OddsResult(
+            odds=odds_percent,
+            min_hunters=min_hunters,
+            complete=complete,
+            stop_reason=stop_reason,
+        )
 
-    def find_successful_paths(self):
+    def fast_path_result(self, build: bool = True) -> OddsResult | None:
+        """
+        The odds if the scenario is trivially decided (arrival out of reach
+        within the countdown, or no bounty hunter anywhere a successful route
+        could meet one), None if it needs a search.
+        Without build, None is also returned when the index is not built yet.
+        """
+        index = fast_path_index(self.falcon_config, self.galaxy, build)
+        if index is None:
+            logger.debug("Fast path index not built yet, searching")
+            return None
+        fast_path = index.classify(self.empire.countdown, self.bounty_hunter_presence)
+        if fast_path is None:
+            return None
+
+        logger.info("Odds settled by the %s fast path", fast_path)
+        if fast_path == UNREACHABLE:
+            return OddsResult(odds=0, min_hunters=None, fast_path=fast_path)
+        return OddsResult(odds=100, min_hunters=0, fast_path=fast_path)
+
+    def find_successful_paths(self, budget: SearchBudget = None):
         """
         BFS to find all successful paths
+        Raise SearchBudgetExceeded if budget runs out before the BFS completes
+        """
+        successful_journeys = []
+        try:
+            for journey in self.iter_successful_paths_bfs(budget):
+                successful_journeys.append(journey)
+        except SearchBudgetExceeded as e:
+            e.successful_journeys = successful_journeys
+            raise
+
+        logger.debug(
+            "BFS complete. Found %d total successful journeys.",
+            len(successful_journeys),
+        )
+        return successful_journeys
+
+    def iter_successful_journeys(self, budget: SearchBudget = None, engine="bfs"):
+        """
+        Generator of (journey, hunters encountered) for every successful
+        journey, as soon as it is found.
+        engine is "bfs" (breadth first, the reference order) or "dfs" (depth
+        first, memory proportional to the route length).
+        Raise SearchBudgetExceeded if budget runs out before the search completes
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown search engine: {engine}")
+        journeys = getattr(self, f"iter_successful_paths_{engine}")(budget)
+        tracer = self.tracer if self.tracer.enabled else None
+
+        for journey in journeys:
+            if tracer:
+                with tracer.phase("score"):
+                    hunters = self.number_of_hunters_on_route(journey.route)
+            else:
+                hunters = self.number_of_hunters_on_route(journey.route)
+            yield journey, hunters
+
+    def iter_successful_paths_bfs(self, budget: SearchBudget = None):
+        """
+        BFS generator of the successful paths, yielded as soon as found
+        Raise SearchBudgetExceeded if budget runs out before the BFS completes
         """
         logger.debug("Beginning BFS to find successful paths.")
         q = deque()
 
-        successful_journeys = []
-
         initial_journey = JourneyLog(
             current_planet=self.falcon_config.departure,
             travel_days=0,
@@ -94,14 +360,30 @@ class OddsService:
 
         q.append(initial_journey)
 
+        # Resolved once: the per-state logging and tracing below are skipped
+        # entirely when disabled, so that they do not distort the timings
+        debug = logger.isEnabledFor(logging.DEBUG)
+        tracer = self.tracer if self.tracer.enabled else None
+        states_expanded = 0
+
         while q:
             journey_log = q.popleft()
-            logger.debug(
-                "Exploring from planet=%s, travel_days=%d, autonomy_left=%d",
-                journey_log.current_planet,
-                journey_log.travel_days,
-                journey_log.autonomy_left,
-            )
+            states_expanded += 1
+            if budget is not None:
+                reason = budget_stop_reason(budget, states_expanded)
+                if reason is not None:
+                    raise SearchBudgetExceeded(reason)
+            if tracer:
+                tracer.expand(
+                    journey_log.current_planet, journey_log.travel_days, len(q) + 1
+                )
+            if debug:
+                logger.debug(
+                    "Exploring from planet=%s, travel_days=%d, autonomy_left=%d",
+                    journey_log.current_planet,
+                    journey_log.travel_days,
+                    journey_log.autonomy_left,
+                )
 
             # Explore all adjacent planets
             for next_planet in self.galaxy.successors(journey_log.current_planet):
@@ -124,18 +406,21 @@ class OddsService:
                         autonomy_left=journey_log.autonomy_left - days_to_next_planet,
                         route=journey_log.route + [journey_log.current_planet],
                     )
-                    logger.debug(
-                        "Possible move to %s, total_days=%d, autonomy_left=%d",
-                        next_planet,
-                        new_journey.travel_days,
-                        new_journey.autonomy_left,
-                    )
-
-                    if next_planet == self.falcon_config.arrival:
+                    if debug:
                         logger.debug(
-                            "Found successful path to arrival planet: %s", next_planet
+                            "Possible move to %s, total_days=%d, autonomy_left=%d",
+                            next_planet,
+                            new_journey.travel_days,
+                            new_journey.autonomy_left,
                         )
-                        successful_journeys.append(new_journey)
+
+                    if next_planet == self.falcon_config.arrival:
+                        if debug:
+                            logger.debug(
+                                "Found successful path to arrival planet: %s",
+                                next_planet,
+                            )
+                        yield new_journey
                     else:
                         q.append(new_journey)
 
@@ -147,11 +432,12 @@ class OddsService:
                     autonomy_left=self.falcon_config.autonomy,
                     route=journey_log.route + [journey_log.current_planet],
                 )
-                logger.debug(
-                    "Refueling at %s => total_days=%d",
-                    journey_log.current_planet,
-                    new_journey.travel_days,
-                )
+                if debug:
+                    logger.debug(
+                        "Refueling at %s => total_days=%d",
+                        journey_log.current_planet,
+                        new_journey.travel_days,
+                    )
                 q.append(new_journey)
 
             # Consider waiting at current planet
@@ -163,27 +449,216 @@ class OddsService:
                     autonomy_left=journey_log.autonomy_left - i,
                     route=journey_log.route + [journey_log.current_planet],
                 )
-                logger.debug(
-                    "Waiting %d days at %s => total_days=%d, autonomy_left=%d",
-                    i,
-                    journey_log.current_planet,
-                    new_journey.travel_days,
-                    new_journey.autonomy_left,
-                )
+                if debug:
+                    logger.debug(
+                        "Waiting %d days at %s => total_days=%d, autonomy_left=%d",
+                        i,
+                        journey_log.current_planet,
+                        new_journey.travel_days,
+                        new_journey.autonomy_left,
+                    )
                 q.append(new_journey)
                 i += 1
 
-        logger.debug(
-            "BFS complete. Found %d total successful journeys.",
-            len(successful_journeys),
-        )
-        return successful_journeys
+    def iter_successful_paths_dfs(self, budget: SearchBudget = None):
+        """
+        DFS generator of the same successful paths as the BFS, in another order.
+        Only the current route and one pending-moves iterator per step of it
+        are kept in memory.
+        Raise SearchBudgetExceeded if budget runs out before the DFS completes
+        """
+        logger.debug("Beginning DFS to find successful paths.")
+        arrival = self.falcon_config.arrival
+        autonomy = self.falcon_config.autonomy
+        countdown = self.empire.countdown
+        tracer = self.tracer if self.tracer.enabled else None
+
+        def moves(planet: str, travel_days: int, autonomy_left: int):
+            """(next planet, travel days, autonomy left, is travel) from a state"""
+            for next_planet in self.galaxy.successors(planet):
+                days_to_next_planet = self.galaxy.edge_value(planet, next_planet)
+                if (
+                    days_to_next_planet is not None
+                    and days_to_next_planet <= autonomy_left
+                    and travel_days + days_to_next_planet <= countdown
+                ):
+                    yield (
+                        next_planet,
+                        travel_days + days_to_next_planet,
+                        autonomy_left - days_to_next_planet,
+                        True,
+                    )
+            if travel_days + 1 <= countdown:
+                yield planet, travel_days + 1, autonomy, False
+            for wait in range(2, countdown - travel_days + 1):
+                yield planet, travel_days + wait, autonomy_left - wait, False
+
+        departure = self.falcon_config.departure
+        # route holds the planets of the states below the top of the stack
+        route = []
+        stack = [(departure, moves(departure, 0, autonomy))]
+        states_expanded = 1
+        if tracer:
+            tracer.expand(departure, 0, len(stack))
+
+        while stack:
+            planet, pending_moves = stack[-1]
+            move = next(pending_moves, None)
+            if move is None:
+                stack.pop()
+                if stack:
+                    route.pop()
+                continue
+
+            next_planet, travel_days, autonomy_left, is_travel = move
+            if is_travel and next_planet == arrival:
+                yield JourneyLog(
+                    current_planet=next_planet,
+                    travel_days=travel_days,
+                    autonomy_left=autonomy_left,
+                    route=route + [planet],
+                )
+                continue
+
+            states_expanded += 1
+            if budget is not None:
+                reason = budget_stop_reason(budget, states_expanded)
+                if reason is not None:
+                    raise SearchBudgetExceeded(reason)
+            if tracer:
+                tracer.expand(next_planet, travel_days, len(stack))
+
+            route.append(planet)
+            stack.append((next_planet, moves(next_planet, travel_days, autonomy_left)))
+
+    def find_safest_routes(
+        self, k: int, budget: SearchBudget = None
+    ) -> list[RouteOption]:
+        """
+        The k successful routes meeting the fewest bounty hunters, safest first.
+        Dynamic programming over (planet, day, autonomy left, hunter day) states
+        processed day by day, keeping at most k partial routes per state instead
+        of enumerating every journey. Routes, refuelling, waiting and bounty
+        hunter encounters follow exactly find_successful_paths and
+        number_of_hunters_on_route: the hunter day advances by the travel time
+        of a hop but by a single day for a refuel or a wait, and neither the
+        departure on day 0 nor the arrival planet are checked.
+        Raise SearchBudgetExceeded if budget runs out before the search completes
+        """
+        logger.debug("Beginning search for the %d safest routes.", k)
+        departure = self.falcon_config.departure
+        arrival = self.falcon_config.arrival
+        autonomy = self.falcon_config.autonomy
+        countdown = self.empire.countdown
+        presence = self.bounty_hunter_presence
+        # Past the last bounty hunter day, hunter days no longer matter
+        last_hunter_day = max((max(days) for days in presence.values()), default=-1)
+        tracer = self.tracer if self.tracer.enabled else None
+        sequence = count()
+
+        def add_label(labels: list, hunters: int, link: tuple):
+            # labels stays sorted and holds at most the k safest partial routes
+            if len(labels) == k and hunters >= labels[-1][0]:
+                return
+            insort(labels, (hunters, next(sequence), link))
+            if len(labels) > k:
+                labels.pop()
+
+        def extend(day, state, labels, step, met):
+            target = days[day].setdefault(state, [])
+            for hunters, _, link in labels:
+                add_label(target, hunters + met, (link, step))
+
+        def hunted(planet, hunter_day):
+            return int(hunter_day in presence.get(planet, ()))
+
+        def to_routes(labels):
+            routes = []
+            for hunters, _, link in labels:
+                itinerary = []
+                while link is not None:
+                    link, step = link
+                    itinerary.append(step)
+                itinerary.reverse()
+                routes.append(
+                    RouteOption(hunters, odds_from_hunters(hunters), itinerary)
+                )
+            return routes
+
+        # days[day] maps the states reached on that day to their partial routes.
+        # A state is (planet, autonomy left, hunter day); all negative autonomies
+        # behave the same and are merged into -1.
+        days = [{} for _ in range(countdown + 1)]
+        days[0][(departure, autonomy, 0)] = [
+            (0, next(sequence), (None, ItineraryStep(0, departure, "depart", False)))
+        ]
+        arrivals = []
+        states_expanded = 0
+
+        for day in range(countdown + 1):
+            states, days[day] = days[day], None
+            for (planet, autonomy_left, hunter_day), labels in states.items():
+                states_expanded += 1
+                if budget is not None:
+                    reason = budget_stop_reason(budget, states_expanded)
+                    if reason is not None:
+                        raise SearchBudgetExceeded(reason, routes=to_routes(arrivals))
+                if tracer:
+                    tracer.expand(planet, day, len(states))
+
+                for next_planet in self.galaxy.successors(planet):
+                    travel_time = self.galaxy.edge_value(planet, next_planet)
+                    if (
+                        travel_time is None
+                        or travel_time > autonomy_left
+                        or day + travel_time > countdown
+                    ):
+                        continue
+
+                    next_day = day + travel_time
+                    step_days = 1 if next_planet == planet else travel_time
+                    next_hunter_day = min(hunter_day + step_days, last_hunter_day + 1)
+
+                    if next_planet == arrival:
+                        step = ItineraryStep(next_day, next_planet, "travel", False)
+                        for hunters, _, link in labels:
+                            add_label(arrivals, hunters, (link, step))
+                        continue
+
+                    met = hunted(next_planet, next_hunter_day)
+                    state = (
+                        next_planet,
+                        max(autonomy_left - travel_time, -1),
+                        next_hunter_day,
+                    )
+                    step = ItineraryStep(next_day, next_planet, "travel", bool(met))
+                    extend(next_day, state, labels, step, met)
+
+                # Refueling or waiting count as a single hunter day
+                next_hunter_day = min(hunter_day + 1, last_hunter_day + 1)
+                met = hunted(planet, next_hunter_day)
+
+                if day + 1 <= countdown:
+                    step = ItineraryStep(day + 1, planet, "refuel", bool(met))
+                    extend(
+                        day + 1, (planet, autonomy, next_hunter_day), labels, step, met
+                    )
+
+                for wait in range(2, countdown - day + 1):
+                    step = ItineraryStep(day + wait, planet, "wait", bool(met))
+                    state = (planet, max(autonomy_left - wait, -1), next_hunter_day)
+                    extend(day + wait, state, labels, step, met)
+
+        logger.debug("Safest routes search expanded %d states.", states_expanded)
+        return to_routes(arrivals)
 
     def number_of_hunters_on_route(self, route: list[str]) -> int:
         """
         Count the number of hunters encountered on the route
         """
-        logger.debug("Calculating bounty hunter encounters for route: %s", route)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Calculating bounty hunter encounters for route: %s", route)
         days = 0
         hunters_encountered = 0
 
@@ -193,32 +668,39 @@ class OddsService:
 
             if planet == next_planet:
                 # Means we spent 1 day refueling or waiting
-                logger.debug("Refueling/waiting at %s => day=%d", next_planet, days)
+                if debug:
+                    logger.debug("Refueling/waiting at %s => day=%d", next_planet, days)
                 days += 1
                 if (
                     next_planet in self.bounty_hunter_presence
                     and days in self.bounty_hunter_presence[next_planet]
                 ):
                     hunters_encountered += 1
-                    logger.debug(
-                        "Encountered hunters at %s on day=%d", next_planet, days
-                    )
+                    if debug:
+                        logger.debug(
+                            "Encountered hunters at %s on day=%d", next_planet, days
+                        )
             else:
                 # Travel from planet to next planet
                 travel_time = self.galaxy.edge_value(planet, next_planet)
 
                 days += travel_time
 
-                logger.debug("Traveling %s->%s => day=%d", planet, next_planet, days)
+                if debug:
+                    logger.debug(
+                        "Traveling %s->%s => day=%d", planet, next_planet, days
+                    )
 
                 if (
                     next_planet in self.bounty_hunter_presence
                     and days in self.bounty_hunter_presence[next_planet]
                 ):
                     hunters_encountered += 1
-                    logger.debug(
-                        "Encountered hunters at %s on day=%d", next_planet, days
-                    )
+                    if debug:
+                        logger.debug(
+                            "Encountered hunters at %s on day=%d", next_planet, days
+                        )
 
-        logger.debug("Total bounty hunter encounters: %d", hunters_encountered)
+        if debug:
+            logger.debug("Total bounty hunter encounters: %d", hunters_encountered)
         return hunters_encountered
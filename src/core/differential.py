@@ -0,0 +1,240 @@
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass, field, replace
+from typing import Callable
+from src.core.core import OddsService
+from src.schemas.data_models import BountyHunter, EmpireData, FalconConfig
+from src.schemas.galaxy import Galaxy
+import logging
+
+logger = logging.getLogger(__name__)
+
+PLANETS = ["Tatooine", "Dagobah", "Hoth", "Bespin", "Kashyyyk", "Endor"]
+
+
+@dataclass
+class Case:
+    """
+    One small scenario: a galaxy, a Falcon and an empire
+    """
+
+    autonomy: int
+    countdown: int
+    departure: str = "Tatooine"
+    arrival: str = "Endor"
+    # (origin, destination, travel time)
+    routes: list[tuple[str, str, int]] = field(default_factory=list)
+    # (planet, day)
+    bounty_hunters: list[tuple[str, int]] = field(default_factory=list)
+
+    def service(self, fast_paths: bool = True) -> OddsService:
+        """A fresh service with this case loaded"""
+        galaxy = Galaxy()
+        for origin, destination, travel_time in self.routes:
+            galaxy.add_route(origin, destination, travel_time)
+        falcon_config = FalconConfig(
+            autonomy=self.autonomy,
+            departure=self.departure,
+            arrival=self.arrival,
+            routes_db_path="differential.db",
+        )
+        service = OddsService(
+            falcon_config=falcon_config, galaxy=galaxy, fast_paths=fast_paths
+        )
+        service.load_empire(self.empire())
+        return service
+
+    def empire(self) -> EmpireData:
+        return EmpireData(
+            countdown=self.countdown,
+            bounty_hunters=[BountyHunter(p, d) for p, d in self.bounty_hunters],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def generate_case(
+    rng: random.Random, max_planets: int = 5, max_countdown: int = 8
+) -> Case:
+    """
+    Random small case. Travel times, autonomy and countdown are kept in the
+    same range so that waiting and refuelling matter. Each case has its own
+    bounty hunter density; hunters can be on any planet, day 0 and the
+    countdown day included.
+    """
+    planets = ["Tatooine", "Endor"] + rng.sample(
+        PLANETS[1:-1], rng.randint(1, max_planets - 2)
+    )
+    # A direct Tatooine-Endor route meets no hunters at all, keep it rare
+    routes = [
+        (origin, destination, rng.randint(1, 4))
+        for i, origin in enumerate(planets)
+        for destination in planets[i + 1 :]
+        if rng.random() < (0.15 if i == 0 and destination == "Endor" else 0.6)
+    ]
+    if rng.random() < 0.1:
+        # Self loops are valid routes DB rows
+        routes.append((rng.choice(planets), rng.choice(planets), rng.randint(1, 3)))
+    countdown = rng.randint(1, max_countdown)
+    density = rng.random()
+    bounty_hunters = [
+        (planet, day)
+        for planet in planets
+        for day in range(countdown + 1)
+        if rng.random() < density
+    ]
+    departure, arrival = "Tatooine", "Endor"
+    if rng.random() < 0.05:
+        arrival = departure
+    return Case(
+        autonomy=rng.randint(1, 6),
+        countdown=countdown,
+        departure=departure,
+        arrival=arrival,
+        routes=routes,
+        bounty_hunters=bounty_hunters,
+    )
+
+
+def reference_odds(case: Case) -> int:
+    """
+    Odds from the full BFS enumeration and number_of_hunters_on_route,
+    without any of the optimizations of OddsService.solve (streaming, early
+    stop, fast paths)
+    """
+    service = case.service(fast_paths=False)
+    journeys = service.find_successful_paths()
+    if not journeys:
+        return 0
+    min_hunters = min(
+        service.number_of_hunters_on_route(journey.route) for journey in journeys
+    )
+    probability_being_captured = sum(9**i / 10 ** (i + 1) for i in range(min_hunters))
+    return int((1 - probability_being_captured) * 100)
+
+
+# Engines checked against reference_odds, by name
+ENGINES: dict[str, Callable[[Case], int]] = {
+    "bfs": lambda case: case.service().evaluate(case.empire(), engine="bfs").odds,
+    "dfs": lambda case: case.service().evaluate(case.empire(), engine="dfs").odds,
+    "bfs-no-fast-paths": lambda case: case.service(fast_paths=False)
+    .evaluate(case.empire())
+    .odds,
+    "safest-routes": lambda case: case.service().evaluate(case.empire(), k=1).odds,
+}
+
+
+def mismatches(case: Case, engines: dict[str, Callable[[Case], int]]) -> dict:
+    """
+    Odds of every engine disagreeing with the reference on case, by name,
+    along with the reference odds. Exceptions count as disagreements.
+    """
+    expected = reference_odds(case)
+    found = {}
+    for name, engine in engines.items():
+        try:
+            odds = engine(case)
+        except Exception as e:
+            odds = f"{type(e).__name__}: {e}"
+        if odds != expected:
+            found[name] = odds
+    if found:
+        found["reference"] = expected
+    return found
+
+
+def _smaller_cases(case: Case):
+    """Candidate simplifications of case, most aggressive first"""
+    for i in range(len(case.routes)):
+        yield replace(case, routes=case.routes[:i] + case.routes[i + 1 :])
+    for i in range(len(case.bounty_hunters)):
+        yield replace(
+            case, bounty_hunters=case.bounty_hunters[:i] + case.bounty_hunters[i + 1 :]
+        )
+    if case.countdown > 1:
+        countdown = case.countdown - 1
+        yield replace(
+            case,
+            countdown=countdown,
+            bounty_hunters=[(p, d) for p, d in case.bounty_hunters if d <= countdown],
+        )
+    if case.autonomy > 1:
+        yield replace(case, autonomy=case.autonomy - 1)
+    for i, (origin, destination, travel_time) in enumerate(case.routes):
+        if travel_time > 1:
+            routes = list(case.routes)
+            routes[i] = (origin, destination, travel_time - 1)
+            yield replace(case, routes=routes)
+    for i, (planet, day) in enumerate(case.bounty_hunters):
+        if day > 0:
+            bounty_hunters = list(case.bounty_hunters)
+            bounty_hunters[i] = (planet, day - 1)
+            yield replace(case, bounty_hunters=bounty_hunters)
+
+
+def shrink(case: Case, fails: Callable[[Case], bool]) -> Case:
+    """
+    Greedily simplify a failing case (fewer routes and hunters, smaller
+    countdown, autonomy, travel times and days) for as long as it still fails
+    """
+    changed = True
+    while changed:
+        changed = False
+        for candidate in _smaller_cases(case):
+            if fails(candidate):
+                case, changed = candidate, True
+                break
+    return case
+
+
+def run(
+    cases: int,
+    seed: int = 0,
+    engines: dict[str, Callable[[Case], int]] = None,
+    max_planets: int = 5,
+    max_countdown: int = 8,
+) -> tuple[Case, dict] | None:
+    """
+    Check engines against the reference on random cases. Returns the first
+    failing case, shrunk, with its mismatches, or None if all cases agree.
+    """
+    engines = ENGINES if engines is None else engines
+    rng = random.Random(seed)
+    for i in range(cases):
+        case = generate_case(rng, max_planets, max_countdown)
+        if mismatches(case, engines):
+            logger.warning("Case %d fails, shrinking it: %s", i, case.to_json())
+            case = shrink(case, lambda c: bool(mismatches(c, engines)))
+            return case, mismatches(case, engines)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the odds engines against the reference BFS on random cases."
+    )
+    parser.add_argument("--cases", type=int, default=1000, help="Number of cases.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--max-planets", type=int, default=5, help="Largest number of planets."
+    )
+    parser.add_argument(
+        "--max-countdown", type=int, default=8, help="Largest countdown."
+    )
+    args = parser.parse_args()
+
+    failure = run(args.cases, args.seed, None, args.max_planets, args.max_countdown)
+    if failure is None:
+        print(f"{args.cases} cases: all engines agree with the reference")
+        return
+
+    case, found = failure
+    print(f"Minimal failing case: {case.to_json()}")
+    print(f"Odds: {json.dumps(found)}")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import heapq
+import math
+import threading
+from src.schemas.data_models import FalconConfig
+from src.schemas.galaxy import Galaxy
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Names of the fast paths, as reported in OddsResult.fast_path
+UNREACHABLE = "unreachable"
+NO_HUNTERS_IN_REACH = "no_hunters_in_reach"
+
+# Serializes the index builds, so that concurrent first requests build it once
+_BUILD_LOCK = threading.Lock()
+
+
+class FastPathIndex:
+    """
+    Shortest-path data of one Galaxy and Falcon, independent of the Empire,
+    used to settle trivial scenarios without searching:
+    - earliest_arrival: first day the Falcon can travel into the arrival
+      planet, refuelling as needed
+    - earliest_check: for each planet, the first day number_of_hunters_on_route
+      can check it for bounty hunters (any action but the departure itself
+      and the final travel into the arrival planet)
+    - to_arrival: for each planet, the shortest travel time to the arrival
+      planet, ignoring autonomy (a lower bound of the time left to reach it)
+    """
+
+    def __init__(self, falcon_config: FalconConfig, galaxy: Galaxy):
+        self.earliest_check, self.earliest_arrival = self._earliest_days(
+            falcon_config, galaxy
+        )
+        self.to_arrival = self._travel_times(falcon_config.arrival, galaxy)
+
+    @staticmethod
+    def _earliest_days(falcon_config: FalconConfig, galaxy: Galaxy):
+        """
+        Dijkstra over (day, planet, autonomy left) states. Waiting is never
+        needed: a refuel takes one day too and leaves more autonomy.
+        A state is skipped when the same planet was reached no later with at
+        least as much autonomy left.
+        """
+        autonomy, arrival = falcon_config.autonomy, falcon_config.arrival
+        earliest_check: dict[str, int] = {}
+        earliest_arrival = math.inf
+        best_autonomy: dict[str, int] = {}
+        heap = [(0, falcon_config.departure, autonomy)]
+
+        def reach(day: int, planet: str, autonomy_left: int):
+            if day < earliest_check.get(planet, math.inf):
+                earliest_check[planet] = day
+            heapq.heappush(heap, (day, planet, autonomy_left))
+
+        while heap:
+            day, planet, autonomy_left = heapq.heappop(heap)
+            if autonomy_left <= best_autonomy.get(planet, -1):
+                continue
+            best_autonomy[planet] = autonomy_left
+
+            for next_planet in galaxy.successors(planet):
+                travel_time = galaxy.edge_value(planet, next_planet)
+                if travel_time > autonomy_left:
+                    continue
+                if next_planet == arrival:
+                    # Travelling into the arrival planet ends the journey
+                    earliest_arrival = min(earliest_arrival, day + travel_time)
+                else:
+                    reach(day + travel_time, next_planet, autonomy_left - travel_time)
+            reach(day + 1, planet, autonomy)
+
+        return earliest_check, earliest_arrival
+
+    @staticmethod
+    def _travel_times(origin: str, galaxy: Galaxy) -> dict[str, int]:
+        """Shortest travel time between origin and every planet (Dijkstra)"""
+        travel_times: dict[str, int] = {}
+        heap = [(0, origin)]
+        while heap:
+            travel_time, planet = heapq.heappop(heap)
+            if planet in travel_times:
+                continue
+            travel_times[planet] = travel_time
+            for next_planet in galaxy.successors(planet):
+                if next_planet not in travel_times:
+                    heapq.heappush(
+                        heap,
+                        (
+                            travel_time + galaxy.edge_value(planet, next_planet),
+                            next_planet,
+                        ),
+                    )
+        return travel_times
+
+    def classify(
+        self, countdown: int, bounty_hunter_presence: dict[str, set[int]]
+    ) -> str | None:
+        """
+        UNREACHABLE if no route reaches the arrival within countdown (odds 0),
+        NO_HUNTERS_IN_REACH if no bounty hunter is on a planet on a day any
+        successful route could check (odds 100), None if a search is needed
+        """
+        if self.earliest_arrival > countdown:
+            return UNREACHABLE
+
+        for planet, days in bounty_hunter_presence.items():
+            first_day = self.earliest_check.get(planet)
+            if first_day is None or planet not in self.to_arrival:
+                continue
+            last_day = countdown - self.to_arrival[planet]
+            if any(first_day <= day <= last_day for day in days):
+                return None
+        return NO_HUNTERS_IN_REACH
+
+
+def fast_path_index(
+    falcon_config: FalconConfig, galaxy: Galaxy, build: bool = True
+) -> FastPathIndex | None:
+    """
+    The FastPathIndex of falcon_config and galaxy, cached on the galaxy.
+    Building it searches the whole galaxy: without build, None is returned
+    instead when it is not built yet. Call it once at startup to warm it up.
+    """
+    key = (
+        "fast_path",
+        falcon_config.departure,
+        falcon_config.arrival,
+        falcon_config.autonomy,
+    )
+    index = galaxy.cache.get(key)
+    if index is not None or not build:
+        return index
+
+    with _BUILD_LOCK:
+        index = galaxy.cache.get(key)
+        if index is None:
+            logger.debug("Building the fast path index of %s", key)
+            index = galaxy.cache[key] = FastPathIndex(falcon_config, galaxy)
+    return index
@@ -0,0 +1,52 @@
+import hashlib
+import json
+from src.schemas.data_models import FalconConfig, EmpireData
+from src.schemas.galaxy import Galaxy
+
+
+def _digest(content) -> str:
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def empire_fingerprint(empire: EmpireData) -> str:
+    """
+    Hash of the Empire Data content.
+    Bounty hunter order and duplicates do not change the odds, so they do not
+    change the fingerprint either.
+    """
+    bounty_hunters = sorted({(bh.planet, bh.day) for bh in empire.bounty_hunters})
+    return _digest({"countdown": empire.countdown, "bounty_hunters": bounty_hunters})
+
+
+def galaxy_fingerprint(galaxy: Galaxy) -> str:
+    """
+    Hash of the routes of the Galaxy, independent of the order they were added in
+    """
+    routes = sorted(
+        [origin, destination, travel_time]
+        for origin, destinations in galaxy.routes.items()
+        for destination, travel_time in destinations.items()
+        if origin <= destination
+    )
+    return _digest(routes)
+
+
+def falcon_fingerprint(falcon_config: FalconConfig) -> str:
+    """
+    Hash of the Falcon parameters used by the search (not the routes DB path)
+    """
+    return _digest(
+        {
+            "autonomy": falcon_config.autonomy,
+            "departure": falcon_config.departure,
+            "arrival": falcon_config.arrival,
+        }
+    )
+
+
+def galaxy_version(falcon_config: FalconConfig, galaxy: Galaxy) -> str:
+    """
+    Version of everything but the Empire Data that the odds depend on
+    """
+    return _digest([falcon_fingerprint(falcon_config), galaxy_fingerprint(galaxy)])
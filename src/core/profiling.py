@@ -0,0 +1,132 @@
+import os
+import time
+import pstats
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """
+    Hooks called by OddsService while it computes the odds.
+    This base tracer records nothing and is disabled: the search loop checks
+    `enabled` once and then skips the per-state hooks entirely.
+    """
+
+    enabled = False
+
+    def phase(self, name: str):
+        """Context manager wrapping one phase of the computation"""
+        return nullcontext()
+
+    def expand(self, planet: str, day: int, frontier_size: int):
+        """Called for every state taken out of the search frontier"""
+
+
+NULL_TRACER = Tracer()
+
+
+class ProfileTracer(Tracer):
+    """
+    Records per-phase durations, per-day frontier sizes and hot planets.
+    Phase durations are exclusive: the time of a phase nested in another
+    (e.g. "score" within "search") is not counted again in the outer one,
+    so that they add up to the total time.
+    """
+
+    enabled = True
+
+    def __init__(self, top_planets: int = 10):
+        self.top_planets = top_planets
+        self.phase_durations: dict[str, float] = defaultdict(float)
+        self.states_per_day: Counter = Counter()
+        self.peak_frontier_per_day: dict[int, int] = {}
+        self.planet_expansions: Counter = Counter()
+        # Time spent in the nested phases of each phase being timed
+        self._nested_durations: list[float] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        self._nested_durations.append(0.0)
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phase_durations[name] += duration - self._nested_durations.pop()
+            if self._nested_durations:
+                self._nested_durations[-1] += duration
+
+    def expand(self, planet: str, day: int, frontier_size: int):
+        self.states_per_day[day] += 1
+        self.planet_expansions[planet] += 1
+        if frontier_size > self.peak_frontier_per_day.get(day, 0):
+            self.peak_frontier_per_day[day] = frontier_size
+
+    def report(self) -> dict:
+        """JSON serializable summary of everything recorded so far"""
+        return {
+            "phases_seconds": dict(self.phase_durations),
+            "states_expanded": sum(self.states_per_day.values()),
+            "days": [
+                {
+                    "day": day,
+                    "states_expanded": self.states_per_day[day],
+                    "peak_frontier": self.peak_frontier_per_day.get(day, 0),
+                }
+                for day in sorted(self.states_per_day)
+            ],
+            "hot_planets": [
+                {"planet": planet, "states_expanded": count}
+                for planet, count in self.planet_expansions.most_common(
+                    self.top_planets
+                )
+            ],
+        }
+
+
+def _frame_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats, min_microseconds: float = 1.0) -> list[str]:
+    """
+    Convert cProfile statistics into collapsed stacks ("a;b;c <microseconds>")
+    that can be fed to flamegraph tools.
+    cProfile only keeps caller/callee pairs, so the time of a function called
+    from several places is split between its callers in proportion to the
+    cumulative time of each call edge.
+    """
+    children: dict[tuple, dict[tuple, float]] = defaultdict(dict)
+    roots = []
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            children[caller][func] = edge[3]
+
+    lines = []
+
+    def walk(func, path, labels, scale):
+        self_time = stats.stats[func][2] * scale * 1e6
+        if self_time >= min_microseconds:
+            lines.append(f"{';'.join(labels)} {round(self_time)}")
+
+        for child, edge_time in children.get(func, {}).items():
+            child_time = stats.stats[child][3]
+            if child in path or not child_time:
+                continue
+            child_scale = scale * edge_time / child_time
+            if child_time * child_scale * 1e6 < min_microseconds:
+                continue
+            walk(child, path | {child}, labels + [_frame_label(child)], child_scale)
+
+    for root in roots:
+        walk(root, {root}, [_frame_label(root)], 1.0)
+
+    return lines
@@ -1,8 +1,21 @@
+import itertools
+import random
+import shutil
 import pytest
 from unittest.mock import MagicMock
-from src.core.core import OddsService
-from src.schemas.data_models import FalconConfig, EmpireData, BountyHunter, JourneyLog
+from src.core.core import ENGINES, OddsService, SearchBudgetExceeded
+from src.schemas.data_models import (
+    FalconConfig,
+    EmpireData,
+    BountyHunter,
+    JourneyLog,
+    SearchBudget,
+    OddsResult,
+    ItineraryStep,
+    RouteOption,
+)
 from src.schemas.galaxy import Galaxy
+from src.parser import parser as parser_module
 
 
 @pytest.fixture
@@ -120,3 +133,270 @@ def test_find_successful_paths_basic(mock_falcon_config, mock_empire_data, mock_
         assert (
             p.current_planet == "Endor"
         ), f"All successful journeys must end at Endor; got {p.current_planet}"
+
+
+def test_compute_odds_for_empire_resets_hunters(mock_falcon_config, mock_galaxy):
+    """
+    Scoring several empires with one service must not leak bounty hunters
+    from one scenario into the next.
+    """
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+
+    hunted = EmpireData(
+        countdown=6,
+        bounty_hunters=[
+            BountyHunter(planet="Hoth", day=4),
+            BountyHunter(planet="Dagobah", day=4),
+        ],
+    )
+    assert service.compute_odds_for_empire(hunted) == 90
+
+    safe = EmpireData(countdown=6, bounty_hunters=[])
+    assert service.compute_odds_for_empire(safe) == 100
+    assert service.bounty_hunter_presence == {}
+
+
+def test_compute_odds_for_empire_requires_loaded_galaxy(mock_empire_data):
+    service = OddsService()
+    with pytest.raises(RuntimeError):
+        service.compute_odds_for_empire(mock_empire_data)
+
+
+def test_evaluate_complete_result(mock_falcon_config, mock_empire_data, mock_galaxy):
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+
+    result = service.evaluate(mock_empire_data)
+    assert result == OddsResult(odds=100, min_hunters=0, complete=True)
+
+
+def guarded_empire(countdown: int) -> EmpireData:
+    """Bounty hunters on Hoth and Dagobah every day of the countdown"""
+    return EmpireData(
+        countdown=countdown,
+        bounty_hunters=[
+            BountyHunter(planet=planet, day=day)
+            for planet in ("Hoth", "Dagobah")
+            for day in range(countdown + 1)
+        ],
+    )
+
+
+def test_evaluate_stops_at_max_states(
+    mock_falcon_config, mock_empire_data, mock_galaxy
+):
+    """
+    When the state budget runs out, the search stops and reports a partial
+    result whose odds are a lower bound of the exact odds.
+    """
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+    # No route avoids the hunters, so the search cannot stop early on its own
+    empire = guarded_empire(mock_empire_data.countdown)
+
+    result = service.evaluate(empire, SearchBudget(max_states=3))
+    assert not result.complete
+    assert result.stop_reason == "max_states"
+    assert result.odds <= service.evaluate(empire).odds
+
+
+def test_evaluate_cancelled_and_deadline(
+    mock_falcon_config, mock_empire_data, mock_galaxy
+):
+    """
+    Cancellation and deadlines are polled every BUDGET_CHECK_INTERVAL states.
+    """
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+    empire = guarded_empire(40)
+
+    result = service.evaluate(empire, SearchBudget(cancelled=lambda: True))
+    assert (result.complete, result.stop_reason) == (False, "cancelled")
+
+    result = service.evaluate(empire, SearchBudget.from_timeout(0))
+    assert (result.complete, result.stop_reason) == (False, "deadline")
+
+
+def test_find_successful_paths_budget_exceeded_keeps_partial_journeys(
+    mock_falcon_config, mock_empire_data, mock_galaxy
+):
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+    service.load_empire(mock_empire_data)
+    all_paths = service.find_successful_paths()
+
+    with pytest.raises(SearchBudgetExceeded) as exc_info:
+        service.find_successful_paths(SearchBudget(max_states=50))
+
+    assert exc_info.value.reason == "max_states"
+    partial = exc_info.value.successful_journeys
+    assert 0 < len(partial) < len(all_paths)
+
+
+@pytest.mark.parametrize("example", [1, 2, 3, 4])
+def test_bounded_galaxy_gives_the_same_odds(tmp_path, monkeypatch, example):
+    """
+    Loading only the routes reachable within the countdown does not change the odds.
+    """
+    monkeypatch.setattr(parser_module, "ROUTE_INDEX_MIN_ROWS", 0)
+    example_dir = f"./examples/example{example}"
+    for name in ("millennium-falcon.json", "empire.json", "universe.db"):
+        shutil.copy(f"{example_dir}/{name}", tmp_path / name)
+    falcon_config = str(tmp_path / "millennium-falcon.json")
+    empire = str(tmp_path / "empire.json")
+
+    service = OddsService(bounded_galaxy=True)
+    bounded_odds = service.compute_odds(falcon_config, empire)
+
+    assert service.galaxy_radius is not None
+    assert bounded_odds == OddsService().compute_odds(falcon_config, empire)
+
+
+def load_example(example: int) -> OddsService:
+    service = OddsService()
+    service.init_journey(
+        f"./examples/example{example}/millennium-falcon.json",
+        f"./examples/example{example}/empire.json",
+    )
+    return service
+
+
+@pytest.mark.parametrize("example", [1, 2, 3, 4])
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_find_safest_routes_matches_full_enumeration(example, k):
+    """
+    The k safest routes meet as many bounty hunters as the k best journeys
+    found by enumerating every successful path.
+    """
+    service = load_example(example)
+    all_hunters = sorted(
+        service.number_of_hunters_on_route(journey.route)
+        for journey in service.find_successful_paths()
+    )
+
+    routes = service.find_safest_routes(k)
+    assert [route.hunters for route in routes] == all_hunters[:k]
+    for route in routes:
+        assert route.itinerary[0] == ItineraryStep(0, "Tatooine", "depart", False)
+        assert route.itinerary[-1].planet == "Endor"
+        assert route.itinerary[-1].day <= service.empire.countdown
+        assert sum(step.bounty_hunters for step in route.itinerary) == route.hunters
+
+
+def test_find_safest_routes_itinerary():
+    """
+    Example 2: the only route goes through Hoth and refuels there while
+    bounty hunters are around on days 6 and 7.
+    """
+    service = load_example(2)
+
+    routes = service.find_safest_routes(3)
+    assert routes == [
+        RouteOption(
+            hunters=2,
+            odds=81,
+            itinerary=[
+                ItineraryStep(0, "Tatooine", "depart", False),
+                ItineraryStep(6, "Hoth", "travel", True),
+                ItineraryStep(7, "Hoth", "refuel", True),
+                ItineraryStep(8, "Endor", "travel", False),
+            ],
+        )
+    ]
+
+
+def test_evaluate_with_safest_routes(mock_falcon_config, mock_galaxy):
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+    empire = EmpireData(countdown=6, bounty_hunters=[BountyHunter("Hoth", 4)])
+
+    result = service.evaluate(empire, k=2)
+    assert (result.odds, result.min_hunters, result.complete) == (100, 0, True)
+    assert [route.hunters for route in result.routes] == [0, 1]
+    assert [route.itinerary[1].planet for route in result.routes] == [
+        "Dagobah",
+        "Hoth",
+    ]
+
+    partial = service.evaluate(empire, SearchBudget(max_states=1), k=2)
+    assert (partial.complete, partial.stop_reason) == (False, "max_states")
+    assert partial.routes == []
+
+
+def journey_key(journey):
+    return (tuple(journey.route), journey.travel_days, journey.autonomy_left)
+
+
+@pytest.mark.parametrize("example", [1, 2, 3, 4])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_iter_successful_journeys_matches_full_enumeration(example, engine):
+    """
+    Both engines stream the journeys found by find_successful_paths, each
+    with the number of bounty hunters met along its route.
+    """
+    service = load_example(example)
+    expected = sorted(
+        journey_key(journey) for journey in service.find_successful_paths()
+    )
+
+    streamed = list(service.iter_successful_journeys(engine=engine))
+    assert sorted(journey_key(journey) for journey, _ in streamed) == expected
+    for journey, hunters in streamed:
+        assert hunters == service.number_of_hunters_on_route(journey.route)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dfs_gives_the_same_odds_as_bfs(seed):
+    rng = random.Random(seed)
+    planets = ["Tatooine", "Dagobah", "Hoth", "Bespin", "Endor"]
+    galaxy = Galaxy()
+    for origin, destination in itertools.combinations(planets, 2):
+        if rng.random() < 0.6:
+            galaxy.add_route(origin, destination, rng.randint(1, 4))
+    falcon_config = FalconConfig(
+        autonomy=rng.randint(1, 6),
+        departure="Tatooine",
+        arrival="Endor",
+        routes_db_path="universe.db",
+    )
+    countdown = rng.randint(1, 9)
+    empire = EmpireData(
+        countdown=countdown,
+        bounty_hunters=[
+            BountyHunter(rng.choice(planets), rng.randint(0, countdown))
+            for _ in range(rng.randint(0, 12))
+        ],
+    )
+
+    service = OddsService(falcon_config=falcon_config, galaxy=galaxy)
+    assert service.evaluate(empire, engine="dfs") == service.evaluate(empire)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_solve_stops_at_a_route_without_bounty_hunters(
+    mock_falcon_config, mock_empire_data, mock_galaxy, engine
+):
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+    service.load_empire(mock_empire_data)
+    journeys_checked = []
+
+    def stream(budget, engine):
+        for journey, hunters in OddsService.iter_successful_journeys(
+            service, budget, engine
+        ):
+            journeys_checked.append(hunters)
+            yield journey, hunters
+
+    service.iter_successful_journeys = stream
+
+    result = service.solve(engine=engine)
+    assert (result.odds, result.min_hunters, result.complete) == (100, 0, True)
+    assert journeys_checked[-1] == 0
+    assert len(journeys_checked) < len(service.find_successful_paths())
+
+
+def test_dfs_budget_exceeded_gives_a_partial_result(mock_falcon_config, mock_galaxy):
+    service = OddsService(falcon_config=mock_falcon_config, galaxy=mock_galaxy)
+    empire = guarded_empire(20)
+
+    result = service.evaluate(empire, SearchBudget(max_states=100), engine="dfs")
+    assert (result.complete, result.stop_reason) == (False, "max_states")
+    assert result.odds <= service.evaluate(empire, engine="dfs").odds
+
+    with pytest.raises(ValueError):
+        service.evaluate(empire, engine="astar")
@@ -0,0 +1,56 @@
+from src.core.differential import (
+    ENGINES,
+    Case,
+    _smaller_cases,
+    mismatches,
+    reference_odds,
+    run,
+)
+
+
+def test_engines_agree_with_the_reference_bfs():
+    assert run(cases=500, seed=1) is None
+
+
+def test_reference_odds():
+    # Example 2 of the challenge, hunters on Hoth on days 6, 7 and 8
+    case = Case(
+        autonomy=6,
+        countdown=8,
+        routes=[
+            ("Tatooine", "Dagobah", 6),
+            ("Dagobah", "Endor", 4),
+            ("Dagobah", "Hoth", 1),
+            ("Hoth", "Endor", 1),
+            ("Tatooine", "Hoth", 6),
+        ],
+        bounty_hunters=[("Hoth", 6), ("Hoth", 7), ("Hoth", 8)],
+    )
+    assert reference_odds(case) == 81
+    assert mismatches(case, ENGINES) == {}
+
+
+def test_failing_case_is_shrunk_to_a_minimal_reproducer():
+    def ignores_hunters(case: Case) -> int:
+        return 100 if reference_odds(case) else 0
+
+    def fails(case: Case) -> bool:
+        return bool(mismatches(case, {"ignores-hunters": ignores_hunters}))
+
+    case, found = run(cases=200, seed=0, engines={"ignores-hunters": ignores_hunters})
+
+    assert found["ignores-hunters"] == 100
+    assert found["reference"] == 90
+    assert len(case.bounty_hunters) == 1
+    assert not any(fails(smaller) for smaller in _smaller_cases(case))
+
+
+def test_engine_errors_are_mismatches():
+    def broken(case: Case) -> int:
+        raise RuntimeError("boom")
+
+    case = Case(autonomy=1, countdown=1, routes=[("Tatooine", "Endor", 1)])
+    assert mismatches(case, {"broken": broken}) == {
+        "broken": "RuntimeError: boom",
+        "reference": 100,
+    }
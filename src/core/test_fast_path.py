@@ -0,0 +1,104 @@
+import pytest
+from src.core.core import OddsService
+from src.core.fast_path import (
+    NO_HUNTERS_IN_REACH,
+    UNREACHABLE,
+    FastPathIndex,
+    fast_path_index,
+)
+from src.schemas.data_models import (
+    BountyHunter,
+    EmpireData,
+    FalconConfig,
+    SearchBudget,
+)
+from src.schemas.galaxy import Galaxy
+
+
+@pytest.fixture
+def falcon_config():
+    return FalconConfig(
+        autonomy=6, departure="Tatooine", arrival="Endor", routes_db_path="unused"
+    )
+
+
+@pytest.fixture
+def galaxy():
+    """Example 1 of the challenge"""
+    galaxy = Galaxy()
+    galaxy.add_route("Tatooine", "Dagobah", 6)
+    galaxy.add_route("Dagobah", "Endor", 4)
+    galaxy.add_route("Dagobah", "Hoth", 1)
+    galaxy.add_route("Hoth", "Endor", 1)
+    galaxy.add_route("Tatooine", "Hoth", 6)
+    return galaxy
+
+
+def test_index(falcon_config, galaxy):
+    index = FastPathIndex(falcon_config, galaxy)
+
+    # Tatooine -> Hoth (6), refuel (7), Hoth -> Endor (8)
+    assert index.earliest_arrival == 8
+    assert index.earliest_check == {"Tatooine": 1, "Dagobah": 6, "Hoth": 6}
+    assert index.to_arrival == {"Endor": 0, "Hoth": 1, "Dagobah": 2, "Tatooine": 7}
+
+
+def test_index_is_cached_on_the_galaxy(falcon_config, galaxy):
+    index = fast_path_index(falcon_config, galaxy)
+    assert fast_path_index(falcon_config, galaxy) is index
+
+    galaxy.add_route("Tatooine", "Endor", 9)
+    assert fast_path_index(falcon_config, galaxy) is not index
+
+
+@pytest.mark.parametrize(
+    "countdown, bounty_hunters, fast_path",
+    [
+        (7, [], UNREACHABLE),
+        (8, [], NO_HUNTERS_IN_REACH),
+        # The departure on day 0 and the arrival planet are never checked
+        (8, [("Tatooine", 0), ("Endor", 8)], NO_HUNTERS_IN_REACH),
+        # Too early to be met on Hoth, or too late to still reach Endor
+        (8, [("Hoth", 5), ("Hoth", 8)], NO_HUNTERS_IN_REACH),
+        (8, [("Hoth", 6)], None),
+        (10, [("Tatooine", 1)], None),
+    ],
+)
+def test_classify(falcon_config, galaxy, countdown, bounty_hunters, fast_path):
+    presence = {}
+    for planet, day in bounty_hunters:
+        presence.setdefault(planet, set()).add(day)
+
+    index = FastPathIndex(falcon_config, galaxy)
+    assert index.classify(countdown, presence) == fast_path
+
+
+@pytest.mark.parametrize("countdown", [7, 8, 10])
+def test_fast_paths_give_the_searched_odds(falcon_config, galaxy, countdown):
+    empire = EmpireData(
+        countdown=countdown,
+        bounty_hunters=[BountyHunter("Tatooine", 0), BountyHunter("Hoth", 5)],
+    )
+
+    result = OddsService(falcon_config=falcon_config, galaxy=galaxy).evaluate(empire)
+    searched = OddsService(
+        falcon_config=falcon_config, galaxy=galaxy, fast_paths=False
+    ).evaluate(empire)
+
+    assert result.fast_path == (UNREACHABLE if countdown < 8 else NO_HUNTERS_IN_REACH)
+    assert searched.fast_path is None
+    assert (result.odds, result.min_hunters) == (searched.odds, searched.min_hunters)
+
+
+def test_budgeted_search_does_not_build_the_index(falcon_config, galaxy):
+    empire = EmpireData(countdown=7, bounty_hunters=[])
+    service = OddsService(falcon_config=falcon_config, galaxy=galaxy)
+
+    result = service.evaluate(empire, SearchBudget.from_timeout(10))
+    assert result.fast_path is None
+    assert result.odds == 0
+    assert fast_path_index(falcon_config, galaxy, build=False) is None
+
+    fast_path_index(falcon_config, galaxy)
+    result = service.evaluate(empire, SearchBudget.from_timeout(10))
+    assert result.fast_path == UNREACHABLE
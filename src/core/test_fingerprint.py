@@ -0,0 +1,57 @@
+from src.core.fingerprint import (
+    empire_fingerprint,
+    galaxy_fingerprint,
+    falcon_fingerprint,
+    galaxy_version,
+)
+from src.schemas.data_models import FalconConfig, EmpireData, BountyHunter
+from src.schemas.galaxy import Galaxy
+
+
+def test_empire_fingerprint_ignores_hunter_order_and_duplicates():
+    empire = EmpireData(
+        countdown=7,
+        bounty_hunters=[BountyHunter("Hoth", 6), BountyHunter("Endor", 7)],
+    )
+    same_empire = EmpireData(
+        countdown=7,
+        bounty_hunters=[
+            BountyHunter("Endor", 7),
+            BountyHunter("Hoth", 6),
+            BountyHunter("Hoth", 6),
+        ],
+    )
+    other_empire = EmpireData(countdown=8, bounty_hunters=empire.bounty_hunters)
+
+    assert empire_fingerprint(empire) == empire_fingerprint(same_empire)
+    assert empire_fingerprint(empire) != empire_fingerprint(other_empire)
+
+
+def test_galaxy_fingerprint_ignores_route_order():
+    galaxy = Galaxy()
+    galaxy.add_route("Tatooine", "Hoth", 6)
+    galaxy.add_route("Hoth", "Endor", 1)
+
+    same_galaxy = Galaxy()
+    same_galaxy.add_route("Endor", "Hoth", 1)
+    same_galaxy.add_route("Tatooine", "Hoth", 6)
+
+    other_galaxy = Galaxy()
+    other_galaxy.add_route("Tatooine", "Hoth", 6)
+    other_galaxy.add_route("Hoth", "Endor", 2)
+
+    assert galaxy_fingerprint(galaxy) == galaxy_fingerprint(same_galaxy)
+    assert galaxy_fingerprint(galaxy) != galaxy_fingerprint(other_galaxy)
+
+
+def test_falcon_fingerprint_ignores_routes_db_path():
+    falcon = FalconConfig(6, "Tatooine", "Endor", "a/universe.db")
+    moved = FalconConfig(6, "Tatooine", "Endor", "b/universe.db")
+    slower = FalconConfig(5, "Tatooine", "Endor", "a/universe.db")
+
+    assert falcon_fingerprint(falcon) == falcon_fingerprint(moved)
+    assert falcon_fingerprint(falcon) != falcon_fingerprint(slower)
+
+    galaxy = Galaxy()
+    galaxy.add_route("Tatooine", "Endor", 6)
+    assert galaxy_version(falcon, galaxy) != galaxy_version(slower, galaxy)
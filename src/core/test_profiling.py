@@ -0,0 +1,74 @@
+import cProfile
+import pstats
+import time
+from src.core.core import OddsService
+from src.core.profiling import NULL_TRACER, ProfileTracer, collapsed_stacks
+from src.schemas.data_models import FalconConfig, EmpireData, BountyHunter
+from src.schemas.galaxy import Galaxy
+
+
+def make_service(tracer=None):
+    galaxy = Galaxy()
+    galaxy.add_route("Tatooine", "Hoth", 2)
+    galaxy.add_route("Hoth", "Endor", 1)
+    falcon_config = FalconConfig(
+        autonomy=3, departure="Tatooine", arrival="Endor", routes_db_path="unused"
+    )
+    return OddsService(falcon_config=falcon_config, galaxy=galaxy, tracer=tracer)
+
+
+def test_null_tracer_is_disabled_by_default():
+    service = make_service()
+    assert service.tracer is NULL_TRACER
+    assert not service.tracer.enabled
+
+
+def test_profile_tracer_records_phases_days_and_planets():
+    tracer = ProfileTracer()
+    service = make_service(tracer)
+
+    odds = service.compute_odds_for_empire(
+        EmpireData(countdown=3, bounty_hunters=[BountyHunter("Hoth", 2)])
+    )
+    assert odds == 90
+
+    report = tracer.report()
+    assert set(report["phases_seconds"]) == {"load", "precheck", "search", "score"}
+    assert report["states_expanded"] == sum(
+        day["states_expanded"] for day in report["days"]
+    )
+    assert report["days"][0] == {"day": 0, "states_expanded": 1, "peak_frontier": 1}
+    assert report["hot_planets"][0]["planet"] == "Tatooine"
+
+
+def test_nested_phases_are_not_counted_twice():
+    tracer = ProfileTracer()
+
+    with tracer.phase("search"):
+        with tracer.phase("score"):
+            time.sleep(0.05)
+
+    phases = tracer.report()["phases_seconds"]
+    assert phases["score"] >= 0.05
+    assert phases["search"] < phases["score"]
+
+
+def test_collapsed_stacks_nest_callees_under_callers():
+    def leaf():
+        return sum(range(20000))
+
+    def outer():
+        return leaf() + leaf()
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    outer()
+    profiler.disable()
+
+    lines = collapsed_stacks(pstats.Stats(profiler))
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) >= 1
+        assert stack
+    assert any("outer" in line and "leaf" in line.split(";")[-1] for line in lines)
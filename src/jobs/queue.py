@@ -0,0 +1,289 @@
+import json
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from src.store.sqlite import ThreadConnections
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+# Seconds a claimed job stays leased to its worker without a heartbeat
+# (progress report); past it, the job is queued again for another worker
+LEASE_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS JOBS (
+    ID TEXT PRIMARY KEY,
+    STATUS TEXT NOT NULL,
+    PRIORITY INTEGER NOT NULL,
+    EMPIRE TEXT NOT NULL,
+    ROUTES INTEGER NOT NULL,
+    SUBMITTED_AT REAL NOT NULL,
+    STARTED_AT REAL,
+    FINISHED_AT REAL,
+    WORKER TEXT,
+    HEARTBEAT_AT REAL,
+    DAYS_PROCESSED INTEGER NOT NULL DEFAULT 0,
+    STATES_EXPANDED INTEGER NOT NULL DEFAULT 0,
+    CANCEL_REQUESTED INTEGER NOT NULL DEFAULT 0,
+    RESULT TEXT,
+    ERROR TEXT
+);
+CREATE INDEX IF NOT EXISTS JOBS_QUEUE ON JOBS (STATUS, PRIORITY, SUBMITTED_AT);
+"""
+
+JOB_COLUMNS = (
+    "ID, STATUS, PRIORITY, EMPIRE, ROUTES, SUBMITTED_AT, STARTED_AT, FINISHED_AT, "
+    "WORKER, DAYS_PROCESSED, STATES_EXPANDED, CANCEL_REQUESTED, RESULT, ERROR, "
+    "HEARTBEAT_AT"
+)
+
+
+@dataclass
+class Job:
+    """
+    One odds computation submitted to the job queue
+    """
+
+    id: str
+    status: str
+    priority: int
+    empire: dict
+    routes: int
+    submitted_at: float
+    started_at: float | None
+    finished_at: float | None
+    worker: str | None
+    days_processed: int
+    states_expanded: int
+    cancel_requested: bool
+    result: dict | None
+    error: str | None
+    heartbeat_at: float | None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        fields = list(row)
+        fields[3] = json.loads(fields[3])
+        fields[11] = bool(fields[11])
+        fields[12] = None if fields[12] is None else json.loads(fields[12])
+        return cls(*fields)
+
+
+class JobQueue:
+    """
+    Queue of odds computations in a local SQLite file, shared by the web
+    workers submitting jobs and the worker processes running them.
+    Jobs are claimed by decreasing priority, then in submission order.
+    A claimed job is leased to its worker, which renews the lease with each
+    progress report; jobs whose lease expired (their worker died) are
+    queued again by the next claim.
+    The database runs in WAL mode so that status polls never wait on a
+    worker reporting progress.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        # Autocommit, transactions are explicit (see claim)
+        self._connections = ThreadConnections(db_path, isolation_level=None)
+
+        with self._connections.get() as conn:
+            conn.executescript(SCHEMA)
+        logger.info("Job queue ready: %s", db_path)
+
+    def submit(self, empire: dict, priority: int = 0, routes: int = 0) -> str:
+        """Queue the odds computation of empire and return its job id"""
+        job_id = uuid.uuid4().hex
+        self._connections.get().execute(
+            "INSERT INTO JOBS (ID, STATUS, PRIORITY, EMPIRE, ROUTES, SUBMITTED_AT) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, priority, json.dumps(empire), routes, time.time()),
+        )
+        logger.info("Job %s queued with priority %d", job_id, priority)
+        return job_id
+
+    def get(self, job_id: str) -> Job | None:
+        row = (
+            self._connections.get()
+            .execute(f"SELECT {JOB_COLUMNS} FROM JOBS WHERE ID = ?", (job_id,))
+            .fetchone()
+        )
+        return None if row is None else Job.from_row(row)
+
+    def claim(self, worker: str) -> Job | None:
+        """
+        Mark the next queued job as running on worker and return it,
+        or None if the queue is empty
+        """
+        conn = self._connections.get()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers
+        # cannot claim the same job
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._requeue_expired(conn)
+            row = conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM JOBS WHERE STATUS = ? "
+                "ORDER BY PRIORITY DESC, SUBMITTED_AT, ID LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job = Job.from_row(row)
+            job.status, job.started_at, job.worker = RUNNING, time.time(), worker
+            job.heartbeat_at = job.started_at
+            conn.execute(
+                "UPDATE JOBS SET STATUS = ?, STARTED_AT = ?, WORKER = ?, "
+                "HEARTBEAT_AT = ? WHERE ID = ?",
+                (job.status, job.started_at, worker, job.heartbeat_at, job.id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info("Job %s claimed by worker %s", job.id, worker)
+        return job
+
+    def report_progress(
+        self, job_id: str, worker: str, days_processed: int, states_expanded: int
+    ) -> bool:
+        """
+        Record the progress of a job running on worker and renew its lease.
+        Returns False if the job is no longer leased to worker.
+        """
+        return bool(
+            self._connections.get()
+            .execute(
+                "UPDATE JOBS SET DAYS_PROCESSED = ?, STATES_EXPANDED = ?, "
+                "HEARTBEAT_AT = ? WHERE ID = ? AND STATUS = ? AND WORKER = ?",
+                (days_processed, states_expanded, time.time(), job_id, RUNNING, worker),
+            )
+            .rowcount
+        )
+
+    def cancel_requested(self, job_id: str) -> bool:
+        row = (
+            self._connections.get()
+            .execute("SELECT CANCEL_REQUESTED FROM JOBS WHERE ID = ?", (job_id,))
+            .fetchone()
+        )
+        return row is not None and bool(row[0])
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job: a queued job is cancelled right away, a running job
+        stops at its worker's next progress check.
+        Returns False if the job is unknown or already finished.
+        """
+        conn = self._connections.get()
+        cancelled = conn.execute(
+            "UPDATE JOBS SET STATUS = ?, FINISHED_AT = ?, CANCEL_REQUESTED = 1 "
+            "WHERE ID = ? AND STATUS = ?",
+            (CANCELLED, time.time(), job_id, QUEUED),
+        ).rowcount
+        if not cancelled:
+            cancelled = conn.execute(
+                "UPDATE JOBS SET CANCEL_REQUESTED = 1 WHERE ID = ? AND STATUS = ?",
+                (job_id, RUNNING),
+            ).rowcount
+        if cancelled:
+            logger.info("Cancellation of job %s requested", job_id)
+        return bool(cancelled)
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: dict | None = None,
+        error: str | None = None,
+        worker: str | None = None,
+    ) -> bool:
+        """
+        Record the outcome of a running job. With worker, only if the job is
+        still leased to it. Returns False if nothing was recorded.
+        """
+        finished = (
+            self._connections.get()
+            .execute(
+                "UPDATE JOBS SET STATUS = ?, FINISHED_AT = ?, RESULT = ?, ERROR = ? "
+                "WHERE ID = ? AND STATUS = ? AND (? IS NULL OR WORKER = ?)",
+                (
+                    status,
+                    time.time(),
+                    None if result is None else json.dumps(result),
+                    error,
+                    job_id,
+                    RUNNING,
+                    worker,
+                    worker,
+                ),
+            )
+            .rowcount
+        )
+        if finished:
+            logger.info("Job %s %s", job_id, status)
+        else:
+            logger.warning("Job %s is no longer leased to worker %s", job_id, worker)
+        return bool(finished)
+
+    def release(self, job_id: str, worker: str) -> bool:
+        """
+        Put a job interrupted by its worker (e.g. on shutdown) back in the queue
+        """
+        released = (
+            self._connections.get()
+            .execute(
+                "UPDATE JOBS SET STATUS = ?, STARTED_AT = NULL, WORKER = NULL, "
+                "HEARTBEAT_AT = NULL WHERE ID = ? AND STATUS = ? AND WORKER = ?",
+                (QUEUED, job_id, RUNNING, worker),
+            )
+            .rowcount
+        )
+        if released:
+            logger.info("Job %s released by worker %s", job_id, worker)
+        return bool(released)
+
+    def requeue_expired(self) -> int:
+        """
+        Put the running jobs whose lease expired (their worker died) back in
+        the queue, or cancel them if their cancellation was requested.
+        Returns the number of jobs queued again.
+        """
+        return self._requeue_expired(self._connections.get())
+
+    def _requeue_expired(self, conn: sqlite3.Connection) -> int:
+        now = time.time()
+        expired_before = now - self.lease_seconds
+        requeued = conn.execute(
+            "UPDATE JOBS SET STATUS = ?, STARTED_AT = NULL, WORKER = NULL, "
+            "HEARTBEAT_AT = NULL "
+            "WHERE STATUS = ? AND HEARTBEAT_AT < ? AND CANCEL_REQUESTED = 0",
+            (QUEUED, RUNNING, expired_before),
+        ).rowcount
+        conn.execute(
+            "UPDATE JOBS SET STATUS = ?, FINISHED_AT = ? "
+            "WHERE STATUS = ? AND HEARTBEAT_AT < ? AND CANCEL_REQUESTED = 1",
+            (CANCELLED, now, RUNNING, expired_before),
+        )
+        if requeued:
+            logger.warning("Requeued %d jobs whose worker stopped responding", requeued)
+        return requeued
+
+    def stats(self) -> dict:
+        """Number of jobs in each status"""
+        rows = (
+            self._connections.get()
+            .execute("SELECT STATUS, COUNT(*) FROM JOBS GROUP BY STATUS")
+            .fetchall()
+        )
+        return {status: count for status, count in rows}
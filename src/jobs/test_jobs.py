@@ -0,0 +1,177 @@
+import threading
+import time
+import pytest
+from src.core.core import OddsService
+from src.jobs import worker as worker_module
+from src.jobs.queue import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue
+from src.jobs.worker import WorkerPool, run_job
+from src.parser.parser import parse_falcon_config, parse_routes_db
+
+EXAMPLE_FALCON_CONFIG = "./examples/example3/millennium-falcon.json"
+
+EXAMPLE_EMPIRE = {
+    "countdown": 9,
+    "bounty_hunters": [
+        {"planet": "Hoth", "day": 6},
+        {"planet": "Hoth", "day": 7},
+        {"planet": "Hoth", "day": 8},
+    ],
+}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+@pytest.fixture
+def service():
+    falcon_config = parse_falcon_config(EXAMPLE_FALCON_CONFIG)
+    return OddsService(
+        falcon_config=falcon_config,
+        galaxy=parse_routes_db(falcon_config.routes_db_path),
+    )
+
+
+def test_jobs_are_claimed_by_priority_then_submission_order(queue):
+    low = queue.submit(EXAMPLE_EMPIRE, priority=0)
+    high = queue.submit(EXAMPLE_EMPIRE, priority=5)
+    low_later = queue.submit(EXAMPLE_EMPIRE, priority=0)
+
+    assert [queue.claim("w").id for _ in range(3)] == [high, low, low_later]
+    assert queue.claim("w") is None
+
+    job = queue.get(high)
+    assert (job.status, job.worker, job.empire) == (RUNNING, "w", EXAMPLE_EMPIRE)
+    assert queue.stats() == {RUNNING: 3}
+
+
+def test_cancel(queue):
+    queued = queue.submit(EXAMPLE_EMPIRE)
+    running = queue.submit(EXAMPLE_EMPIRE, priority=1)
+    queue.claim("w")
+
+    assert queue.cancel(queued)
+    assert queue.get(queued).status == CANCELLED
+    assert queue.claim("w") is None
+
+    assert queue.cancel(running)
+    assert queue.get(running).status == RUNNING
+    assert queue.cancel_requested(running)
+
+    queue.finish(running, CANCELLED)
+    assert not queue.cancel(running)
+    assert not queue.cancel("unknown")
+
+
+def test_only_expired_leases_are_requeued(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.2)
+    alive = queue.submit(EXAMPLE_EMPIRE, priority=1)
+    dead = queue.submit(EXAMPLE_EMPIRE)
+    queue.claim("alive")
+    queue.claim("dead")
+
+    assert queue.requeue_expired() == 0
+    time.sleep(0.3)
+    assert queue.report_progress(alive, "alive", 1, 10)
+    assert queue.requeue_expired() == 1
+
+    job = queue.get(dead)
+    assert (job.status, job.worker) == (QUEUED, None)
+    assert queue.get(alive).status == RUNNING
+
+    # The dead worker lost its job to the next claim
+    assert queue.claim("other").id == dead
+    assert not queue.report_progress(dead, "dead", 1, 10)
+    assert not queue.finish(dead, DONE, worker="dead")
+    assert queue.finish(dead, DONE, worker="other")
+
+
+def test_release(queue):
+    job_id = queue.submit(EXAMPLE_EMPIRE)
+    queue.claim("w")
+
+    assert not queue.release(job_id, "other")
+    assert queue.release(job_id, "w")
+    assert queue.claim("w").id == job_id
+
+
+def test_run_job(queue, service):
+    job_id = queue.submit(EXAMPLE_EMPIRE, routes=2)
+    run_job(queue, queue.claim("w"), service)
+
+    job = queue.get(job_id)
+    assert job.status == DONE
+    assert job.result["odds"] == 90
+    assert job.result["complete"]
+    assert [route["hunters"] for route in job.result["routes"]] == [1, 2]
+    assert job.states_expanded > 0
+    assert job.days_processed == EXAMPLE_EMPIRE["countdown"]
+
+
+def test_run_job_cancelled(monkeypatch, queue, service):
+    monkeypatch.setattr(worker_module, "PROGRESS_INTERVAL_SECONDS", 0)
+    empire = {
+        "countdown": 40,
+        "bounty_hunters": [
+            {"planet": planet, "day": day}
+            for planet in ("Tatooine", "Dagobah", "Hoth", "Bespin")
+            for day in range(41)
+        ],
+    }
+    job_id = queue.submit(empire)
+    job = queue.claim("w")
+    queue.cancel(job_id)
+
+    run_job(queue, job, service)
+
+    job = queue.get(job_id)
+    assert job.status == CANCELLED
+    assert job.result["complete"] is False
+    assert job.result["stop_reason"] == "cancelled"
+
+
+def test_run_job_interrupted_by_stop(monkeypatch, queue, service):
+    monkeypatch.setattr(worker_module, "PROGRESS_INTERVAL_SECONDS", 0)
+    empire = {
+        "countdown": 40,
+        "bounty_hunters": [
+            {"planet": planet, "day": day}
+            for planet in ("Tatooine", "Dagobah", "Hoth", "Bespin")
+            for day in range(41)
+        ],
+    }
+    job_id = queue.submit(empire)
+    stop = threading.Event()
+    stop.set()
+
+    run_job(queue, queue.claim("w"), service, stop=stop)
+
+    job = queue.get(job_id)
+    assert (job.status, job.worker, job.result) == (QUEUED, None, None)
+
+
+def test_run_job_failed(queue, service):
+    job_id = queue.submit({"bounty_hunters": []})
+    run_job(queue, queue.claim("w"), service)
+
+    job = queue.get(job_id)
+    assert job.status == FAILED
+    assert job.error
+
+
+def test_worker_pool_drains_the_queue(queue):
+    job_ids = [queue.submit(EXAMPLE_EMPIRE, priority=i % 3) for i in range(4)]
+
+    pool = WorkerPool(queue.db_path, EXAMPLE_FALCON_CONFIG, workers=2)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 60
+        while queue.stats().get(DONE, 0) < len(job_ids):
+            assert time.monotonic() < deadline, queue.stats()
+            time.sleep(0.1)
+    finally:
+        pool.stop(timeout=10)
+
+    assert {queue.get(job_id).result["odds"] for job_id in job_ids} == {90}
+    assert len({queue.get(job_id).worker for job_id in job_ids}) <= 2
@@ -0,0 +1,272 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+from dataclasses import asdict
+from src.core.core import OddsService
+from src.core.fast_path import fast_path_index
+from src.core.profiling import NULL_TRACER, Tracer
+from src.jobs.queue import CANCELLED, DONE, FAILED, Job, JobQueue
+from src.parser.parser import (
+    parse_falcon_config,
+    parse_empire_content,
+    parse_routes_db,
+)
+from src.schemas.data_models import SearchBudget
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FALCON_CONFIG = "./src/backend/millennium-falcon.json"
+
+# Seconds between two progress reports (and cancellation checks) of a job
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+# Seconds an idle worker waits before looking at the queue again
+POLL_INTERVAL_SECONDS = 0.2
+
+# Seconds WorkerPool.stop waits for the workers to put their current job
+# back in the queue before terminating them
+STOP_TIMEOUT_SECONDS = 10
+
+
+class JobProgressTracer(Tracer):
+    """
+    Counts the states expanded by the search of one job and the days it
+    reached, and periodically writes them to the job queue.
+    Its poll method is used as the cancelled callable of the search budget,
+    so the queue is only queried every BUDGET_CHECK_INTERVAL states and at
+    most once per PROGRESS_INTERVAL_SECONDS.
+    The search is interrupted, rather than cancelled, when stop is set or
+    when the job is no longer leased to worker.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        job_id: str,
+        worker: str,
+        stop: multiprocessing.Event = None,
+    ):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker = worker
+        self.stop = stop
+        self.states_expanded = 0
+        self.days_processed = 0
+        self.interrupted = False
+        self.cancel_requested = False
+        self._next_report = time.monotonic() + PROGRESS_INTERVAL_SECONDS
+
+    def expand(self, planet: str, day: int, frontier_size: int):
+        self.states_expanded += 1
+        if day > self.days_processed:
+            self.days_processed = day
+
+    def report(self) -> bool:
+        """Report progress, False if the job is no longer leased to worker"""
+        return self.queue.report_progress(
+            self.job_id, self.worker, self.days_processed, self.states_expanded
+        )
+
+    def poll(self) -> bool:
+        """
+        Report progress if due, then tell whether the search must stop
+        """
+        if self.stop is not None and self.stop.is_set():
+            self.interrupted = True
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._next_report = now + PROGRESS_INTERVAL_SECONDS
+            if not self.report():
+                self.interrupted = True
+            self.cancel_requested = self.queue.cancel_requested(self.job_id)
+        return self.cancel_requested or self.interrupted
+
+
+def run_job(
+    queue: JobQueue,
+    job: Job,
+    service: OddsService,
+    timeout: float | None = None,
+    max_states: int | None = None,
+    stop: multiprocessing.Event = None,
+):
+    """
+    Compute the odds of a claimed job with service (whose Falcon config and
+    Galaxy are loaded) and record its outcome in the queue.
+    If stop is set meanwhile, the job is put back in the queue instead.
+    """
+    tracer = JobProgressTracer(queue, job.id, job.worker, stop)
+    service.tracer = tracer
+    budget = SearchBudget.from_timeout(timeout, max_states, cancelled=tracer.poll)
+    try:
+        empire = parse_empire_content(job.empire, f"job {job.id}")
+        result = service.evaluate(empire, budget, k=job.routes)
+    except Exception as e:
+        logger.exception("Job %s failed: %s", job.id, e)
+        queue.finish(job.id, FAILED, error=str(e), worker=job.worker)
+        return
+    finally:
+        service.tracer = NULL_TRACER
+
+    if tracer.interrupted and not tracer.cancel_requested:
+        logger.warning("Job %s interrupted", job.id)
+        queue.release(job.id, job.worker)
+        return
+
+    tracer.report()
+    response = {
+        "odds": result.odds,
+        "complete": result.complete,
+        "stop_reason": result.stop_reason,
+        "fast_path": result.fast_path,
+    }
+    if job.routes:
+        response["routes"] = [asdict(route) for route in result.routes]
+    status = CANCELLED if result.stop_reason == "cancelled" else DONE
+    queue.finish(job.id, status, result=response, worker=job.worker)
+
+
+def work(
+    db_path: str,
+    falcon_config_path: str,
+    stop: multiprocessing.Event,
+    timeout: float | None = None,
+    max_states: int | None = None,
+):
+    """
+    Worker process: load the galaxy once, then run queued jobs until stop is set
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    falcon_config = parse_falcon_config(falcon_config_path)
+    galaxy = parse_routes_db(falcon_config.routes_db_path)
+    service = OddsService(falcon_config=falcon_config, galaxy=galaxy)
+    fast_path_index(falcon_config, galaxy)
+    queue = JobQueue(db_path)
+    logger.info("Job worker %s started", worker)
+
+    while not stop.is_set():
+        job = queue.claim(worker)
+        if job is None:
+            stop.wait(POLL_INTERVAL_SECONDS)
+            continue
+        run_job(queue, job, service, timeout, max_states, stop)
+
+    logger.info("Job worker %s stopped", worker)
+
+
+class WorkerPool:
+    """
+    Pool of worker processes draining the job queue of db_path
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        falcon_config_path: str,
+        workers: int,
+        timeout: float | None = None,
+        max_states: int | None = None,
+    ):
+        self.db_path = db_path
+        self.falcon_config_path = falcon_config_path
+        self.workers = workers
+        self.timeout = timeout
+        self.max_states = max_states
+        # Workers start from a fresh interpreter rather than a fork of a
+        # process that may hold SQLite connections or server threads
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._processes = []
+
+    def start(self):
+        JobQueue(self.db_path).requeue_expired()
+        for _ in range(self.workers):
+            process = self._context.Process(
+                target=work,
+                args=(
+                    self.db_path,
+                    self.falcon_config_path,
+                    self._stop,
+                    self.timeout,
+                    self.max_states,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info("Started %d job workers", self.workers)
+
+    def stop(self, timeout: float = STOP_TIMEOUT_SECONDS):
+        """
+        Stop the workers: their running job is interrupted at its next budget
+        check and put back in the queue. Workers still running after timeout
+        seconds are terminated, and their job queued again once its lease
+        expires.
+        """
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Terminating job worker %s", process.pid)
+                process.terminate()
+                process.join()
+        self._processes = []
+
+    def join(self):
+        """Wait for the workers to exit"""
+        for process in self._processes:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run worker processes computing the odds of queued jobs."
+    )
+    parser.add_argument("queue", help="Path to the SQLite job queue file.")
+    parser.add_argument(
+        "--falcon-config",
+        default=DEFAULT_FALCON_CONFIG,
+        help="millennium-falcon.json whose galaxy the jobs are computed on.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Search budget of one job in seconds (unlimited by default).",
+    )
+    parser.add_argument(
+        "--max-states",
+        type=int,
+        help="Search budget of one job in states (unlimited by default).",
+    )
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=logging.INFO)
+    pool = WorkerPool(
+        args.queue, args.falcon_config, args.workers, args.timeout, args.max_states
+    )
+    pool.start()
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        logger.info("Stopping job workers")
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from src.parser.parser import parse_falcon_config, parse_routes_db
+import logging
+
+logger = logging.getLogger(__name__)
+
+ODDS_PATH = "/api/v1/odds/"
+
+DEFAULT_FALCON_CONFIG = "./src/backend/millennium-falcon.json"
+
+# Seconds to wait for the locally started server to answer
+SERVER_STARTUP_TIMEOUT = 30
+
+
+def generate_empires(
+    planets: list[str], count: int, max_countdown: int, seed: int = 0
+) -> list[dict]:
+    """
+    Generate count random empire.json contents over the given planets
+    """
+    rng = random.Random(seed)
+    empires = []
+    for _ in range(count):
+        countdown = rng.randint(1, max_countdown)
+        bounty_hunters = [
+            {"planet": rng.choice(planets), "day": rng.randint(0, countdown)}
+            for _ in range(rng.randint(0, 2 * len(planets)))
+        ]
+        empires.append({"countdown": countdown, "bounty_hunters": bounty_hunters})
+    return empires
+
+
+def encode_multipart(empire: dict) -> tuple[bytes, str]:
+    """
+    Encode empire as the empire_file field of a multipart/form-data body.
+    Returns the body and its Content-Type header.
+    """
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="empire_file"; filename="empire.json"\r\n'
+        "Content-Type: application/json\r\n\r\n"
+        f"{json.dumps(empire)}\r\n"
+        f"--{boundary}--\r\n"
+    ).encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(concurrency: int, latencies: list[float], errors: int, elapsed: float):
+    """
+    Throughput and latency (milliseconds) of one concurrency level.
+    Latencies are None (null in the JSON report) without successful requests.
+    """
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    latency_ms = dict.fromkeys(("mean", "p50", "p95", "p99", "max"))
+    if latencies:
+        latency_ms = {
+            "mean": sum(latencies) / len(latencies) * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": latencies[-1] * 1000,
+        }
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": total / elapsed if elapsed else None,
+        "latency_ms": latency_ms,
+    }
+
+
+def format_level(result: dict) -> str:
+    """One line summary of a concurrency level"""
+
+    def number(value, unit=""):
+        return f"{'n/a':>7}" if value is None else f"{value:7.1f}{unit}"
+
+    latency = result["latency_ms"]
+    return (
+        f"concurrency={result['concurrency']:<4} "
+        f"req/s={number(result['requests_per_second'])}  "
+        f"p50={number(latency['p50'], 'ms')}  p95={number(latency['p95'], 'ms')}  "
+        f"p99={number(latency['p99'], 'ms')}  errors={result['errors']}"
+    )
+
+
+def run_level(
+    url: str, payloads: list[tuple[bytes, str]], concurrency: int, requests: int
+):
+    """
+    Send requests POSTs, cycling over payloads, from concurrency client threads
+    each keeping its own connection alive
+    """
+    parts = urlsplit(url)
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def client():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        try:
+            while True:
+                with lock:
+                    index = next(counter)
+                if index >= requests:
+                    return
+                body, content_type = payloads[index % len(payloads)]
+                start = time.perf_counter()
+                try:
+                    connection.request(
+                        "POST", ODDS_PATH, body, {"Content-Type": content_type}
+                    )
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException) as e:
+                    logger.warning("Request failed: %s", e)
+                    connection.close()
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors[0] += 1
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return summarize(concurrency, latencies, errors[0], time.perf_counter() - start)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(url: str, process: subprocess.Popen, timeout: float):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+        try:
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.1)
+    raise RuntimeError(f"Server did not answer on {url} within {timeout} seconds")
+
+
+def start_server(
+    port: int, workers: int = 1, log_level: str = "warning"
+) -> subprocess.Popen:
+    """
+    Start src.backend.app:app with uvicorn from the repository root.
+    log_level applies to the app (ODDS_LOG_LEVEL) as well as to uvicorn, so
+    that per-state debug logging does not dominate the measured latencies.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "src.backend.app:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        log_level.lower(),
+    ]
+    logger.info("Starting server: %s", " ".join(cmd))
+    return subprocess.Popen(
+        cmd,
+        cwd=root,
+        env={**os.environ, "ODDS_LOG_LEVEL": log_level.upper()},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the Millennium Falcon Odds API on this machine."
+    )
+    parser.add_argument(
+        "--falcon-config",
+        default=DEFAULT_FALCON_CONFIG,
+        help="millennium-falcon.json whose galaxy is used to generate empires.",
+    )
+    parser.add_argument(
+        "--url",
+        help="Base URL of an already running server. By default a server is "
+        "started locally with uvicorn for the duration of the test.",
+    )
+    parser.add_argument(
+        "--server-workers",
+        type=int,
+        default=1,
+        help="Number of uvicorn workers of the locally started server.",
+    )
+    parser.add_argument(
+        "--server-log-level",
+        default="warning",
+        help="Log level of the locally started server (default: warning).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,16",
+        help="Comma separated concurrency levels to run, in order.",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests sent per level."
+    )
+    parser.add_argument(
+        "--scenarios", type=int, default=50, help="Number of distinct empires."
+    )
+    parser.add_argument(
+        "--max-countdown", type=int, default=10, help="Largest generated countdown."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--output", default="loadtest-results.json", help="JSON file for the results."
+    )
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    falcon_config = parse_falcon_config(args.falcon_config)
+    planets = sorted(parse_routes_db(falcon_config.routes_db_path).routes)
+    empires = generate_empires(planets, args.scenarios, args.max_countdown, args.seed)
+    payloads = [encode_multipart(empire) for empire in empires]
+
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{free_port()}"
+        server = start_server(
+            urlsplit(url).port, args.server_workers, args.server_log_level
+        )
+
+    try:
+        if server is not None:
+            wait_for_server(url, server, SERVER_STARTUP_TIMEOUT)
+        started_at = datetime.now(timezone.utc)
+        results = []
+        for concurrency in levels:
+            result = run_level(url, payloads, concurrency, args.requests)
+            results.append(result)
+            print(format_level(result))
+        finished_at = datetime.now(timezone.utc)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "url": url,
+        "config": {
+            "falcon_config": args.falcon_config,
+            "server_workers": args.server_workers if server else None,
+            "server_log_level": args.server_log_level if server else None,
+            "requests_per_level": args.requests,
+            "scenarios": args.scenarios,
+            "max_countdown": args.max_countdown,
+            "seed": args.seed,
+        },
+        "levels": results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
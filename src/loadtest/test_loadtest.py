@@ -0,0 +1,126 @@
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.loadtest.loadtest import (
+    SERVER_STARTUP_TIMEOUT,
+    generate_empires,
+    encode_multipart,
+    format_level,
+    free_port,
+    percentile,
+    run_level,
+    start_server,
+    summarize,
+    wait_for_server,
+)
+
+
+def test_generate_empires_is_reproducible():
+    planets = ["Tatooine", "Hoth", "Endor"]
+
+    empires = generate_empires(planets, 20, max_countdown=8, seed=3)
+    assert empires == generate_empires(planets, 20, max_countdown=8, seed=3)
+    assert len(empires) == 20
+    for empire in empires:
+        assert 1 <= empire["countdown"] <= 8
+        for hunter in empire["bounty_hunters"]:
+            assert hunter["planet"] in planets
+            assert 0 <= hunter["day"] <= empire["countdown"]
+
+
+def test_encode_multipart_wraps_empire_file():
+    empire = {"countdown": 7, "bounty_hunters": []}
+
+    body, content_type = encode_multipart(empire)
+    boundary = content_type.split("boundary=")[1]
+
+    assert content_type.startswith("multipart/form-data; ")
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert body.endswith(f"--{boundary}--\r\n".encode())
+    assert b'name="empire_file"; filename="empire.json"' in body
+    assert json.dumps(empire).encode() in body
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([4.0], 0.99) == 4.0
+    assert math.isnan(percentile([], 0.5))
+
+
+def test_summarize_level():
+    summary = summarize(4, [0.2, 0.1, 0.4, 0.3], errors=1, elapsed=2.0)
+
+    assert summary["requests"] == 5
+    assert summary["errors"] == 1
+    assert summary["requests_per_second"] == 2.5
+    assert summary["latency_ms"]["p50"] == 200.0
+    assert summary["latency_ms"]["max"] == 400.0
+
+
+def test_summarize_level_without_successful_requests():
+    summary = summarize(2, [], errors=3, elapsed=0.5)
+
+    assert summary["latency_ms"]["p99"] is None
+    # The report stays valid JSON
+    assert json.loads(json.dumps(summary, allow_nan=False)) == summary
+    assert "n/a" in format_level(summary)
+
+
+@pytest.fixture
+def flaky_server():
+    """Local server failing every third request"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            requests.append(self.path)
+            status = 500 if len(requests) % 3 == 0 else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_level_counts_requests_and_errors(flaky_server):
+    url, requests = flaky_server
+    payloads = [encode_multipart({"countdown": 1, "bounty_hunters": []})]
+
+    summary = run_level(url, payloads, concurrency=3, requests=9)
+
+    assert len(requests) == 9
+    assert set(requests) == {"/api/v1/odds/"}
+    assert (summary["requests"], summary["errors"]) == (9, 3)
+    assert summary["latency_ms"]["p50"] > 0
+
+
+def test_start_server_answers_odds():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    payloads = [encode_multipart({"countdown": 9, "bounty_hunters": []})]
+
+    server = start_server(port)
+    try:
+        wait_for_server(url, server, SERVER_STARTUP_TIMEOUT)
+        summary = run_level(url, payloads, concurrency=2, requests=4)
+    finally:
+        server.terminate()
+        server.wait()
+
+    assert (summary["requests"], summary["errors"]) == (4, 0)
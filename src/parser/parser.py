@@ -1,3 +1,4 @@
+import heapq
 import json
 import sqlite3
 from src.schemas.data_models import FalconConfig, EmpireData, BountyHunter
@@ -6,6 +7,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# ROUTES tables smaller than this are read whole rather than indexed
+ROUTE_INDEX_MIN_ROWS = 10_000
+
 
 def parse_falcon_config(config_file_path: str) -> FalconConfig:
     """
@@ -59,6 +63,19 @@ def parse_empire_data(empire_data_path: str) -> EmpireData:
         empire_data = json.load(empire_data_file)
     logger.debug("Raw JSON loaded for empire data: %s", empire_data)
 
+    return parse_empire_content(empire_data, empire_data_path)
+
+
+def parse_empire_content(empire_data: dict, empire_data_path: str) -> EmpireData:
+    """
+    Build the Empire Data from already decoded JSON content.
+    empire_data_path is only used to point at the source in error messages.
+    Raise keyError if the content is not in the correct format
+    """
+    if not isinstance(empire_data, dict):
+        logger.error("Empire data is not a JSON object: %s", empire_data_path)
+        raise KeyError(f"Empire data must be a JSON object in: {empire_data_path}")
+
     required_keys = ["countdown", "bounty_hunters"]
     for key in required_keys:
         if key not in empire_data:
@@ -83,11 +100,24 @@ def parse_empire_data(empire_data_path: str) -> EmpireData:
     return empire_data_obj
 
 
-def parse_routes_db(routes_db_path: str) -> Galaxy:
+def parse_routes_db(
+    routes_db_path: str,
+    departure: str = None,
+    max_travel_time: int = None,
+    autonomy: int = None,
+) -> Galaxy:
     """
     Reads routes from the given db file and builds a Galaxy object.
     Expecting a table named ROUTES with columns: ORIGIN, DESTINATION, TRAVEL_TIME
+    When departure and max_travel_time are given, only the routes that can be
+    travelled within max_travel_time days of departure (with legs no longer
+    than autonomy) are loaded, see parse_routes_subgraph.
     """
+    if departure is not None and max_travel_time is not None:
+        return parse_routes_subgraph(
+            routes_db_path, departure, max_travel_time, autonomy
+        )
+
     logger.info("Parsing routes from DB file: %s", routes_db_path)
     galaxy = Galaxy()
 
@@ -109,3 +139,112 @@ def parse_routes_db(routes_db_path: str) -> Galaxy:
         logger.error("SQLite error occurred while reading routes: %s", str(e))
         raise
     return galaxy
+
+
+def ensure_route_indexes(conn: sqlite3.Connection) -> bool:
+    """
+    Make sure ROUTES is indexed on ORIGIN and on DESTINATION, creating the
+    missing indexes on tables of at least ROUTE_INDEX_MIN_ROWS rows.
+    Returns False when the indexes are not available (small or read-only table)
+    """
+    indexed_columns = set()
+    for index in conn.execute("PRAGMA index_list(ROUTES)").fetchall():
+        first_column = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchone()
+        if first_column is not None:
+            indexed_columns.add(first_column[2].upper())
+
+    missing = [c for c in ("ORIGIN", "DESTINATION") if c not in indexed_columns]
+    if not missing:
+        return True
+
+    (rows,) = conn.execute("SELECT COUNT(*) FROM ROUTES").fetchone()
+    if rows < ROUTE_INDEX_MIN_ROWS:
+        logger.debug("ROUTES only has %d rows, not indexing it.", rows)
+        return False
+
+    try:
+        for column in missing:
+            logger.info("Creating index on ROUTES(%s)", column)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS ROUTES_{column}_IDX ON ROUTES ({column})"
+            )
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        logger.warning("Could not index the ROUTES table: %s", str(e))
+        return False
+    return True
+
+
+def parse_routes_subgraph(
+    routes_db_path: str, departure: str, max_travel_time: int, autonomy: int = None
+) -> Galaxy:
+    """
+    Reads only the routes reachable from departure within max_travel_time days.
+    Planets are expanded by increasing travel time (Dijkstra) with one indexed
+    query each, keeping only the legs that still fit in max_travel_time and
+    in autonomy. As in parse_routes_db, the last row (by rowid) of a pair of
+    planets wins, so legs are filtered after picking it.
+    Falls back to reading the whole table if it is not indexed.
+    """
+    logger.info(
+        "Parsing routes within %d days of %s from DB file: %s",
+        max_travel_time,
+        departure,
+        routes_db_path,
+    )
+
+    try:
+        with sqlite3.connect(routes_db_path) as conn:
+            if not ensure_route_indexes(conn):
+                logger.info("ROUTES is not indexed, reading the whole table.")
+                return parse_routes_db(routes_db_path)
+
+            galaxy = Galaxy()
+            fetched_rows = 0
+            max_leg = max_travel_time if autonomy is None else autonomy
+            travel_times = {departure: 0}
+            expanded = set()
+            heap = [(0, departure)]
+
+            while heap:
+                travel_time_to_planet, planet = heapq.heappop(heap)
+                if planet in expanded:
+                    continue
+                expanded.add(planet)
+
+                leg_limit = min(max_leg, max_travel_time - travel_time_to_planet)
+                rows = conn.execute(
+                    "SELECT ROWID, ORIGIN, DESTINATION, TRAVEL_TIME FROM ROUTES "
+                    "WHERE ORIGIN = ? "
+                    "UNION ALL "
+                    "SELECT ROWID, ORIGIN, DESTINATION, TRAVEL_TIME FROM ROUTES "
+                    "WHERE DESTINATION = ? "
+                    "ORDER BY 1",
+                    (planet, planet),
+                ).fetchall()
+                fetched_rows += len(rows)
+
+                # Last row of each neighbour, in the order of parse_routes_db
+                legs = {}
+                for _, origin, destination, travel_time in rows:
+                    neighbour = destination if origin == planet else origin
+                    legs[neighbour] = (origin, destination, travel_time)
+
+                for neighbour, (origin, destination, travel_time) in legs.items():
+                    if travel_time > leg_limit:
+                        continue
+                    galaxy.add_route(origin, destination, travel_time)
+                    arrival_time = travel_time_to_planet + travel_time
+                    if arrival_time < travel_times.get(neighbour, arrival_time + 1):
+                        travel_times[neighbour] = arrival_time
+                        heapq.heappush(heap, (arrival_time, neighbour))
+
+            logger.info(
+                "Fetched %d rows for %d reachable planets from the database.",
+                fetched_rows,
+                len(expanded),
+            )
+    except sqlite3.Error as e:
+        logger.error("SQLite error occurred while reading routes: %s", str(e))
+        raise
+    return galaxy
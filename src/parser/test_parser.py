@@ -1,7 +1,13 @@
 import json
 import pytest
 import sqlite3
-from src.parser.parser import parse_falcon_config, parse_empire_data, parse_routes_db
+from src.parser import parser as parser_module
+from src.parser.parser import (
+    parse_falcon_config,
+    parse_empire_data,
+    parse_empire_content,
+    parse_routes_db,
+)
 from src.schemas.data_models import FalconConfig, EmpireData, BountyHunter
 from src.schemas.galaxy import Galaxy
 
@@ -126,3 +132,99 @@ def test_parse_routes_db_success(tmp_path):
     assert "planetB" in galaxy.routes
     assert "planetC" in galaxy.routes["planetB"]
     assert galaxy.routes["planetB"]["planetC"] == 1
+
+
+def test_parse_empire_content_success():
+
+    empire_data = parse_empire_content(
+        {"countdown": 6, "bounty_hunters": [{"planet": "planetA", "day": 2}]},
+        "<stdin>:1",
+    )
+
+    assert empire_data == EmpireData(
+        countdown=6, bounty_hunters=[BountyHunter(planet="planetA", day=2)]
+    )
+
+
+def test_parse_empire_content_not_an_object_raises():
+
+    with pytest.raises(KeyError) as exc_info:
+        _ = parse_empire_content([1, 2, 3], "<stdin>:4")
+    assert "<stdin>:4" in str(exc_info.value)
+
+
+def make_routes_db(db_path, routes):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE ROUTES (ORIGIN TEXT, DESTINATION TEXT, TRAVEL_TIME INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO ROUTES (ORIGIN, DESTINATION, TRAVEL_TIME) VALUES (?, ?, ?)",
+        routes,
+    )
+    conn.commit()
+    conn.close()
+
+
+def route_indexes(db_path):
+    conn = sqlite3.connect(db_path)
+    names = {row[1] for row in conn.execute("PRAGMA index_list(ROUTES)")}
+    conn.close()
+    return names
+
+
+def test_parse_routes_subgraph_loads_only_reachable_routes(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser_module, "ROUTE_INDEX_MIN_ROWS", 0)
+    db_path = tmp_path / "universe.db"
+    make_routes_db(
+        db_path,
+        [
+            ("planetA", "planetB", 2),
+            ("planetC", "planetB", 3),  # reached through DESTINATION
+            ("planetC", "planetD", 4),  # 2 + 3 + 4 > 8 days
+            ("planetA", "planetE", 7),  # longer than the autonomy
+            ("planetF", "planetG", 1),  # not connected
+        ],
+    )
+
+    galaxy = parse_routes_db(
+        str(db_path), departure="planetA", max_travel_time=8, autonomy=6
+    )
+
+    assert galaxy.routes == {
+        "planetA": {"planetB": 2},
+        "planetB": {"planetA": 2, "planetC": 3},
+        "planetC": {"planetB": 3},
+    }
+    assert route_indexes(db_path) == {"ROUTES_ORIGIN_IDX", "ROUTES_DESTINATION_IDX"}
+
+
+def test_parse_routes_subgraph_small_table_reads_everything(tmp_path):
+    db_path = tmp_path / "universe.db"
+    make_routes_db(db_path, [("planetA", "planetB", 2), ("planetC", "planetD", 1)])
+
+    galaxy = parse_routes_db(str(db_path), departure="planetA", max_travel_time=1)
+
+    assert set(galaxy.routes) == {"planetA", "planetB", "planetC", "planetD"}
+    assert route_indexes(db_path) == set()
+
+
+def test_parse_routes_subgraph_last_duplicate_row_wins(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser_module, "ROUTE_INDEX_MIN_ROWS", 0)
+    db_path = tmp_path / "universe.db"
+    rows = [
+        ("Tatooine", "Endor", 2),
+        ("Tatooine", "Endor", 3),  # overrides the row above
+        ("Hoth", "Tatooine", 1),
+        ("Tatooine", "Hoth", 9),  # overrides the row above, too long
+    ]
+    make_routes_db(db_path, rows)
+
+    full = parse_routes_db(str(db_path))
+    bounded = parse_routes_db(
+        str(db_path), departure="Tatooine", max_travel_time=5, autonomy=2
+    )
+
+    assert full.routes["Tatooine"] == {"Endor": 3, "Hoth": 9}
+    # The winning rows are longer than the autonomy, as in the full galaxy
+    assert bounded.routes == {}
@@ -1,4 +1,6 @@
+import time
 from dataclasses import dataclass
+from typing import Callable
 
 
 @dataclass
@@ -43,3 +45,69 @@ class JourneyLog:
     travel_days: int
     autonomy_left: int
     route: list[str]
+
+
+@dataclass
+class SearchBudget:
+    """
+    Limits of one odds computation: a deadline (time.monotonic() value),
+    a maximum number of expanded states and a cancellation check
+    """
+
+    deadline: float | None = None
+    max_states: int | None = None
+    cancelled: Callable[[], bool] | None = None
+
+    @classmethod
+    def from_timeout(
+        cls,
+        timeout: float | None = None,
+        max_states: int | None = None,
+        cancelled: Callable[[], bool] | None = None,
+    ) -> "SearchBudget":
+        """Budget whose deadline is timeout seconds from now"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return cls(deadline=deadline, max_states=max_states, cancelled=cancelled)
+
+
+@dataclass
+class ItineraryStep:
+    """
+    One step of an itinerary: where the Falcon is on which day and why.
+    action is one of "depart", "travel", "refuel" or "wait" and
+    bounty_hunters tells whether the step counts as a bounty hunter encounter
+    """
+
+    day: int
+    planet: str
+    action: str
+    bounty_hunters: bool
+
+
+@dataclass
+class RouteOption:
+    """
+    One successful route with its bounty hunter encounters and odds
+    """
+
+    hunters: int
+    odds: int
+    itinerary: list[ItineraryStep]
+
+
+@dataclass
+class OddsResult:
+    """
+    Outcome of one odds computation.
+    When the search budget ran out, complete is False, stop_reason tells which
+    limit was hit and odds is a lower bound (best route found so far)
+    routes holds the safest routes when they were asked for
+    fast_path names the pre-check that settled the odds without searching
+    """
+
+    odds: int
+    min_hunters: int | None
+    complete: bool = True
+    stop_reason: str | None = None
+    routes: list[RouteOption] | None = None
+    fast_path: str | None = None
@@ -11,11 +11,16 @@ class Galaxy:
 
     def __init__(self):
         self.routes: dict[str, dict[str, int]] = {}
+        # Data derived from the routes by the search (e.g. shortest paths),
+        # cleared whenever a route is added
+        self.cache: dict = {}
 
     def add_route(self, origin: str, destination: str, travel_time: int):
         logger.info(
             f"Adding route from {origin} to {destination} in {travel_time} days"
         )
+        self.cache.clear()
+
         # Add forward path
         if origin not in self.routes:
             self.routes[origin] = {}
@@ -0,0 +1,27 @@
+import sqlite3
+import threading
+
+
+class ThreadConnections:
+    """
+    One connection per thread to a local SQLite file, opened on first use.
+    The database runs in WAL mode so that readers never wait on a writer,
+    including in other processes.
+    """
+
+    def __init__(self, db_path: str, isolation_level: str | None = ""):
+        self.db_path = db_path
+        self.isolation_level = isolation_level
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Connection of the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path, timeout=30, isolation_level=self.isolation_level
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
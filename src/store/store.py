@@ -0,0 +1,235 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from src.schemas.data_models import OddsResult, RouteOption, ItineraryStep
+from src.store.sqlite import ThreadConnections
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Expired and excess entries are evicted every EVICTION_INTERVAL writes
+EVICTION_INTERVAL = 100
+
+# Bytes counted for an entry on top of its routes: the hashes of its key
+# and its other columns
+ENTRY_OVERHEAD_BYTES = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS RESULTS (
+    GALAXY_HASH TEXT NOT NULL,
+    EMPIRE_HASH TEXT NOT NULL,
+    FALCON_HASH TEXT NOT NULL,
+    ODDS INTEGER NOT NULL,
+    MIN_HUNTERS INTEGER,
+    FAST_PATH TEXT,
+    ROUTES TEXT,
+    ROUTES_ASKED INTEGER NOT NULL,
+    SIZE INTEGER NOT NULL,
+    CREATED_AT REAL NOT NULL,
+    PRIMARY KEY (GALAXY_HASH, EMPIRE_HASH, FALCON_HASH)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS RESULTS_CREATED_AT ON RESULTS (CREATED_AT);
+"""
+
+
+@dataclass
+class StoredResult:
+    """
+    One complete odds computation read back from the store
+    """
+
+    odds: int
+    min_hunters: int | None
+    fast_path: str | None
+    # Safest routes (RouteOption dicts) found for the routes_asked asked for;
+    # fewer when the scenario has no more successful routes
+    routes: list | None
+    routes_asked: int
+    created_at: float
+
+    def has_routes(self, routes: int) -> bool:
+        """Whether the routes safest routes are all known"""
+        return routes <= self.routes_asked
+
+    def to_odds_result(self, routes: int = 0) -> OddsResult:
+        """
+        The stored result, with its first routes safest routes if routes > 0
+        """
+        result = OddsResult(
+            odds=self.odds, min_hunters=self.min_hunters, fast_path=self.fast_path
+        )
+        if routes:
+            result.routes = [
+                RouteOption(
+                    hunters=route["hunters"],
+                    odds=route["odds"],
+                    itinerary=[ItineraryStep(**step) for step in route["itinerary"]],
+                )
+                for route in (self.routes or [])[:routes]
+            ]
+        return result
+
+
+class ResultStore:
+    """
+    Persistent store of complete odds computations in a local SQLite file.
+    Entries are keyed by (galaxy hash, empire hash, falcon hash). The database
+    runs in WAL mode so that several processes (e.g. uvicorn workers) can read
+    and write it concurrently. Entries older than max_age_seconds are
+    discarded, and the oldest entries are evicted past max_entries or once
+    the entries add up to more than max_bytes (routes and key overhead).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 100_000,
+        max_age_seconds: float = 7 * 24 * 3600,
+        max_bytes: int | None = None,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._connections = ThreadConnections(db_path)
+        self._lock = threading.Lock()
+
+        with self._connections.get() as conn:
+            conn.executescript(SCHEMA)
+        logger.info("Result store ready: %s", db_path)
+
+    def get(
+        self, galaxy_hash: str, empire_hash: str, falcon_hash: str
+    ) -> StoredResult | None:
+        """The stored result of this key, or None if missing or expired"""
+        row = (
+            self._connections.get()
+            .execute(
+                "SELECT ODDS, MIN_HUNTERS, FAST_PATH, ROUTES, ROUTES_ASKED, "
+                "CREATED_AT "
+                "FROM RESULTS "
+                "WHERE GALAXY_HASH = ? AND EMPIRE_HASH = ? AND FALCON_HASH = ? "
+                "AND CREATED_AT >= ?",
+                (
+                    galaxy_hash,
+                    empire_hash,
+                    falcon_hash,
+                    time.time() - self.max_age_seconds,
+                ),
+            )
+            .fetchone()
+        )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        odds, min_hunters, fast_path, routes, routes_asked, created_at = row
+        return StoredResult(
+            odds=odds,
+            min_hunters=min_hunters,
+            fast_path=fast_path,
+            routes=None if routes is None else json.loads(routes),
+            routes_asked=routes_asked,
+            created_at=created_at,
+        )
+
+    def put(
+        self,
+        galaxy_hash: str,
+        empire_hash: str,
+        falcon_hash: str,
+        result: OddsResult,
+        routes: list | None = None,
+        routes_asked: int = 0,
+    ):
+        """
+        Store a result and the routes (RouteOption dicts) found when asking
+        for the routes_asked safest routes.
+        Partial results (search budget exceeded) are not stored.
+        """
+        if not result.complete:
+            logger.debug("Not storing partial result for empire %s", empire_hash)
+            return
+
+        routes_json = None if routes is None else json.dumps(routes)
+        size = ENTRY_OVERHEAD_BYTES + len(routes_json or "")
+        with self._connections.get() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO RESULTS (GALAXY_HASH, EMPIRE_HASH, "
+                "FALCON_HASH, ODDS, MIN_HUNTERS, FAST_PATH, ROUTES, ROUTES_ASKED, "
+                "SIZE, CREATED_AT) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    galaxy_hash,
+                    empire_hash,
+                    falcon_hash,
+                    result.odds,
+                    result.min_hunters,
+                    result.fast_path,
+                    routes_json,
+                    routes_asked,
+                    size,
+                    time.time(),
+                ),
+            )
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % EVICTION_INTERVAL == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete expired entries and the oldest ones past max_entries or
+        max_bytes
+        """
+        with self._connections.get() as conn:
+            expired = conn.execute(
+                "DELETE FROM RESULTS WHERE CREATED_AT < ?",
+                (time.time() - self.max_age_seconds,),
+            ).rowcount
+            excess = conn.execute(
+                "DELETE FROM RESULTS WHERE CREATED_AT <= ("
+                "SELECT CREATED_AT FROM RESULTS ORDER BY CREATED_AT DESC "
+                "LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            if self.max_bytes is not None:
+                excess += conn.execute(
+                    "DELETE FROM RESULTS WHERE CREATED_AT <= ("
+                    "SELECT CREATED_AT FROM (SELECT CREATED_AT, "
+                    "SUM(SIZE) OVER (ORDER BY CREATED_AT DESC) AS TOTAL "
+                    "FROM RESULTS) WHERE TOTAL > ? "
+                    "ORDER BY CREATED_AT DESC LIMIT 1)",
+                    (self.max_bytes,),
+                ).rowcount
+
+        if expired or excess:
+            logger.info(
+                "Evicted %d expired and %d excess results from the store.",
+                expired,
+                excess,
+            )
+        return expired + excess
+
+    def __len__(self) -> int:
+        conn = self._connections.get()
+        return conn.execute("SELECT COUNT(*) FROM RESULTS").fetchone()[0]
+
+    def size(self) -> int:
+        """Bytes counted against max_bytes"""
+        return (
+            self._connections.get()
+            .execute("SELECT COALESCE(SUM(SIZE), 0) FROM RESULTS")
+            .fetchone()[0]
+        )
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
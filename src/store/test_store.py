@@ -0,0 +1,134 @@
+import multiprocessing
+import sqlite3
+import time
+from dataclasses import asdict
+from concurrent.futures import ProcessPoolExecutor
+from src.store.store import ResultStore
+from src.schemas.data_models import OddsResult, RouteOption, ItineraryStep
+
+
+def test_put_and_get(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+
+    assert store.get("galaxy", "empire", "falcon") is None
+
+    store.put(
+        "galaxy",
+        "empire",
+        "falcon",
+        OddsResult(odds=81, min_hunters=2),
+        routes=[{"hunters": 2, "odds": 81, "itinerary": []}],
+        routes_asked=3,
+    )
+
+    stored = store.get("galaxy", "empire", "falcon")
+    assert stored.odds == 81
+    assert stored.min_hunters == 2
+    assert stored.routes == [{"hunters": 2, "odds": 81, "itinerary": []}]
+    assert stored.routes_asked == 3
+    assert stored.to_odds_result() == OddsResult(odds=81, min_hunters=2)
+
+    assert store.get("other-galaxy", "empire", "falcon") is None
+    assert store.stats() == {"hits": 1, "misses": 2}
+
+
+def test_uses_wal_mode(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultStore(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_partial_results_are_not_stored(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+
+    partial = OddsResult(
+        odds=0, min_hunters=None, complete=False, stop_reason="deadline"
+    )
+    store.put("galaxy", "empire", "falcon", partial)
+
+    assert store.get("galaxy", "empire", "falcon") is None
+    assert len(store) == 0
+
+
+def test_evicts_expired_and_excess_entries(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), max_entries=3, max_age_seconds=60)
+
+    for i in range(5):
+        store.put("galaxy", f"empire{i}", "falcon", OddsResult(odds=i, min_hunters=0))
+        time.sleep(0.01)
+
+    assert store.evict() == 2
+    assert len(store) == 3
+    assert store.get("galaxy", "empire0", "falcon") is None
+    assert store.get("galaxy", "empire4", "falcon").odds == 4
+
+    store.max_age_seconds = 0
+    assert store.get("galaxy", "empire4", "falcon") is None
+    assert store.evict() == 3
+
+
+def _put_from_process(db_path, index):
+    store = ResultStore(db_path)
+    store.put(
+        "galaxy", f"empire{index}", "falcon", OddsResult(odds=index, min_hunters=0)
+    )
+    return store.get("galaxy", f"empire{index}", "falcon").odds
+
+
+def test_shared_across_processes(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultStore(db_path)
+
+    # uvicorn starts its workers as fresh processes, not forks
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as executor:
+        results = list(executor.map(_put_from_process, [db_path] * 20, range(20)))
+
+    assert results == list(range(20))
+    assert len(ResultStore(db_path)) == 20
+
+
+def test_stored_routes_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    routes = [
+        RouteOption(
+            hunters=hunters,
+            odds=odds,
+            itinerary=[
+                ItineraryStep(0, "Tatooine", "depart", False),
+                ItineraryStep(4, "Endor", "travel", False),
+            ],
+        )
+        for hunters, odds in ((0, 100), (1, 90))
+    ]
+    result = OddsResult(odds=100, min_hunters=0, routes=routes)
+
+    store.put("galaxy", "empire", "falcon", result, [asdict(r) for r in routes], 5)
+
+    stored = store.get("galaxy", "empire", "falcon")
+    assert stored.to_odds_result() == OddsResult(odds=100, min_hunters=0)
+    assert stored.to_odds_result(1).routes == routes[:1]
+    # Only two routes exist: they are all of the 5 safest ones
+    assert stored.has_routes(5)
+    assert stored.to_odds_result(5).routes == routes
+    assert not stored.has_routes(6)
+
+
+def test_evicts_past_max_bytes(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), max_bytes=3 * 1000)
+    routes = [{"hunters": 0, "odds": 100, "itinerary": ["x" * 500]}]
+
+    for i in range(5):
+        result = OddsResult(odds=i, min_hunters=0)
+        store.put("galaxy", f"empire{i}", "falcon", result, routes, 1)
+        time.sleep(0.01)
+
+    assert store.size() > store.max_bytes
+    assert store.evict() == 2
+    assert store.size() <= store.max_bytes
+    assert store.get("galaxy", "empire1", "falcon") is None
+    assert store.get("galaxy", "empire2", "falcon").odds == 2
+